@@ -1,13 +1,13 @@
 import os
 import sys
 import django
-from math import radians, sin, cos, sqrt, asin
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'deliciae_core.settings')
 django.setup()
 
 from core.models import Restaurant
+from core import geo
 
 def simulate_6km_away():
     # Grill and Chill Coords
@@ -21,24 +21,14 @@ def simulate_6km_away():
     print(f"Simulating User Location (approx 6km away): {user_lat:.4f}, {user_lng:.4f}")
     
     candidates = Restaurant.objects.filter(is_open=True)
-    count = 0
-    
-    for r in candidates:
-        if r.latitude is None or r.longitude is None:
-            continue
-            
-        lon1, lat1, lon2, lat2 = map(radians, [user_lng, user_lat, r.longitude, r.latitude])
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        distance = c * 6371
-        
-        if distance <= 100.0: # New default
-             print(f"MATCH: {r.name:<20} | Dist: {distance:.2f}km")
-             count += 1
-        else:
-             print(f"SKIP : {r.name:<20} | Dist: {distance:.2f}km")
+    rows = candidates.values_list('id', 'latitude', 'longitude')
+    ids, distances = geo.nearby(user_lat, user_lng, 100.0, rows) # New default
+    names = dict(candidates.filter(id__in=ids.tolist()).values_list('id', 'name'))
+
+    for restaurant_id, distance in zip(ids.tolist(), distances.tolist()):
+        print(f"MATCH: {names[restaurant_id]:<20} | Dist: {distance:.2f}km")
+
+    print(f"SKIP : {candidates.count() - len(ids)} restaurants outside 100km")
 
 if __name__ == "__main__":
     simulate_6km_away()
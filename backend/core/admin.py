@@ -3,9 +3,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import (
-    User, Restaurant, FoodItem, Order, FoodAnalytics,
+    User, Restaurant, FoodItem, Order, FoodAnalytics, FoodAnalyticsHourly,
     Offer, UserOffer, Notification, RestaurantCrowd,
-    Table, Booking, Reel, Comment, Follow
+    Table, Booking, Reel, Comment, Follow, BackgroundJob, RestaurantTrendStats
 )
 
 # Custom User Admin
@@ -27,12 +27,28 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ('notification_type', 'is_read')
     search_fields = ('title', 'message')
 
+# Background Job Admin
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'progress', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+
+# Hourly Analytics Admin
+class FoodAnalyticsHourlyAdmin(admin.ModelAdmin):
+    list_display = ('food_item', 'interaction_type', 'hour', 'count')
+    list_filter = ('interaction_type',)
+
+# Restaurant Trend Stats Admin
+class RestaurantTrendStatsAdmin(admin.ModelAdmin):
+    list_display = ('restaurant', 'city', 'item_count', 'avg_trend_score', 'max_trend_score', 'refreshed_at')
+    search_fields = ('restaurant__name', 'city')
+
 # Register Models
 admin.site.register(User, CustomUserAdmin)
 admin.site.register(Restaurant)
 admin.site.register(FoodItem)
 admin.site.register(Order)
 admin.site.register(FoodAnalytics)
+admin.site.register(FoodAnalyticsHourly, FoodAnalyticsHourlyAdmin)
 admin.site.register(Offer, OfferAdmin)
 admin.site.register(UserOffer)
 admin.site.register(Notification, NotificationAdmin)
@@ -42,3 +58,5 @@ admin.site.register(Booking)
 admin.site.register(Reel)
 admin.site.register(Comment)
 admin.site.register(Follow)
+admin.site.register(BackgroundJob, BackgroundJobAdmin)
+admin.site.register(RestaurantTrendStats, RestaurantTrendStatsAdmin)
@@ -1,11 +1,18 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import Order, FoodItem, Restaurant
-from .serializers import FoodItemSerializer
-from django.db.models import Count, Q, F
-from collections import Counter
-import datetime
+from .models import FoodItem
+from .serializers import FoodItemSerializer, restaurant_stats_prefetch
+from .recommendations import recommendations_for
+from .recommendation_cache import cached_recommendations
+from .highlights import get_highlights
+from .sellout import selling_out
+from django.db.models import prefetch_related_objects
+
+def serialize_items(items):
+    """Serialize a list of food items, loading their restaurants (with stats) in one query."""
+    prefetch_related_objects(items, restaurant_stats_prefetch())
+    return FoodItemSerializer(items, many=True).data
 
 class RecommendationView(APIView):
     permission_classes = [IsAuthenticated]
@@ -13,58 +20,16 @@ class RecommendationView(APIView):
     def get(self, request):
         """
         Get personalized recommendations based on user's order history.
-        Logic: Content-based filtering (Category & Cuisine preference).
+        Logic: Content-based filtering (Category & Cuisine preference),
+        read from the precomputed taste profile (see core.recommendations).
+        Responses are cached per user until the user orders or an item goes unavailable.
         """
-        user = request.user
-        
-        # 1. Analyze User History (Last 10 orders)
-        last_orders = Order.objects.filter(customer=user).order_by('-created_at')[:10]
-        
-        # Cold Start: If no history, return Trending items
-        if not last_orders.exists():
-            return self.get_trending_response()
-            
-        ordered_items_ids = []
-        categories = []
-        cuisines = []
-        
-        for order in last_orders:
-            for item in order.items.all():
-                ordered_items_ids.append(item.id)
-                categories.append(item.category)
-                cuisines.append(item.restaurant.cuisine_type)
-        
-        if not categories:
-             return self.get_trending_response()
-             
-        # Determine preferences
-        fav_category = Counter(categories).most_common(1)[0][0]
-        fav_cuisine = Counter(cuisines).most_common(1)[0][0] if cuisines else None
-        
-        # 2. Find Similar Items (Same Category OR Same Cuisine)
-        # Exclude items already ordered recently
-        recommendations = FoodItem.objects.filter(
-            is_available=True
-        ).filter(
-            Q(category=fav_category) | Q(restaurant__cuisine_type=fav_cuisine)
-        ).exclude(
-            id__in=ordered_items_ids
-        ).order_by('-popularity_score', '-trend_score')[:5]
-        
-        # Fill with trending if not enough recommendations
-        if recommendations.count() < 5:
-            needed = 5 - recommendations.count()
-            trending = FoodItem.objects.filter(is_available=True).exclude(
-                id__in=[r.id for r in recommendations]
-            ).order_by('-trend_score')[:needed]
-            recommendations = list(recommendations) + list(trending)
-        
-        return Response(FoodItemSerializer(recommendations, many=True).data)
-
-    def get_trending_response(self):
-        # Fallback to general trending items
-        items = FoodItem.objects.filter(is_available=True).order_by('-trend_score')[:5]
-        return Response(FoodItemSerializer(items, many=True).data)
+        data = cached_recommendations(
+            request.user,
+            compute=recommendations_for,
+            serialize=serialize_items,
+        )
+        return Response(data)
 
 class SmartHighlightsView(APIView):
     permission_classes = [AllowAny]
@@ -75,31 +40,9 @@ class SmartHighlightsView(APIView):
         - Trending: High trend_score
         - Fast Selling: Low quantity + High popularity
         - Top Rated: High popularity_score (Proxy for rating)
+        Served from a cached snapshot (see core.highlights).
         """
-        # 1. Trending
-        trending = FoodItem.objects.filter(
-            is_available=True
-        ).order_by('-trend_score')[:5]
-        
-        # 2. Fast Selling (Quantity < 20 and Popular)
-        fast_selling = FoodItem.objects.filter(
-            is_available=True, 
-            quantity_available__lt=20,
-            quantity_available__gt=0
-        ).order_by('-popularity_score')[:5]
-        
-        # 3. Top Rated (Using popularity_score as proxy since FoodItem has no direct rating)
-        # Or fetch items from Top Rated Restaurants
-        # Let's use popularity_score for now
-        top_rated = FoodItem.objects.filter(
-            is_available=True
-        ).order_by('-popularity_score')[:5]
-        
-        return Response({
-            'trending': FoodItemSerializer(trending, many=True).data,
-            'fast_selling': FoodItemSerializer(fast_selling, many=True).data,
-            'top_rated': FoodItemSerializer(top_rated, many=True).data
-        })
+        return Response(get_highlights(serialize_items))
 
 class SellingOutView(APIView):
     permission_classes = [AllowAny]
@@ -107,10 +50,8 @@ class SellingOutView(APIView):
     def get(self, request):
         """
         Get items predicted to sell out soon.
+        Estimates come from order velocity (see core.sellout) and are read through
+        the estimated_sellout_time index, re-projected with the rates decayed to now;
+        projections already in the past or beyond the horizon are skipped.
         """
-        selling_out = FoodItem.objects.filter(
-            is_available=True,
-            estimated_sellout_time__isnull=False
-        ).order_by('estimated_sellout_time')[:10]
-        
-        return Response(FoodItemSerializer(selling_out, many=True).data)
+        return Response(serialize_items(selling_out(FoodItem.objects.all(), limit=10)))
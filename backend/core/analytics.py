@@ -0,0 +1,204 @@
+"""
+FoodAnalytics storage: raw events plus hourly rollups.
+
+Every view/click/search/order interaction is stored as a raw FoodAnalytics row,
+but nothing ever reads individual rows, only counts. compact_analytics() folds
+the raw rows of finished hours into FoodAnalyticsHourly and deletes them, so the
+raw table only holds the current hour. interaction_counts() answers count queries
+from both tables.
+
+Rolled-up events are timestamped at the start of their hour. Callers that slice
+by time should use hour-aligned boundaries (floor_hour) to get exact counts.
+
+Views log interactions through record_interactions(), which buffers events per
+worker process and writes them with one bulk_create once ANALYTICS_BUFFER_SIZE
+events are pending or ANALYTICS_FLUSH_INTERVAL seconds have passed since the last
+flush, and once more when the process exits. The interval is checked on each
+record and by a timer thread, so an idle worker doesn't sit on buffered events. A flush also
+pushes the trend deltas of the written view/click/search events (core.trends), so
+requests never update trend scores row by row.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import FoodAnalytics, FoodAnalyticsHourly
+
+
+logger = logging.getLogger('core.analytics')
+
+
+class AnalyticsBuffer:
+    """Per-process write-behind buffer of FoodAnalytics rows."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._last_flush = time.monotonic()
+        self._pid = os.getpid()
+        self._timer = None
+
+    def record(self, interaction_type, item_ids, created_at=None):
+        created_at = created_at or timezone.now()
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: events buffered by the parent are the parent's to write
+                # (and its timer thread didn't survive the fork)
+                self._events, self._pid, self._timer = [], os.getpid(), None
+            self._events.extend(
+                FoodAnalytics(food_item_id=item_id, interaction_type=interaction_type, created_at=created_at)
+                for item_id in item_ids
+            )
+            due = (
+                len(self._events) >= getattr(settings, 'ANALYTICS_BUFFER_SIZE', 500)
+                or time.monotonic() - self._last_flush >= getattr(settings, 'ANALYTICS_FLUSH_INTERVAL', 5)
+            )
+            if not due and self._timer is None:
+                self._timer = threading.Timer(getattr(settings, 'ANALYTICS_FLUSH_INTERVAL', 5), self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _timed_flush(self):
+        """Timer thread: flush whatever is pending; the next record() re-arms the timer."""
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        finally:
+            connections.close_all()  # This thread's connections only
+
+    def flush(self):
+        """Write all pending events; returns how many were written."""
+        with self._lock:
+            events, self._events = self._events, []
+            self._last_flush = time.monotonic()
+        if not events:
+            return 0
+        try:
+            FoodAnalytics.objects.bulk_create(events, batch_size=1000)
+        except Exception:
+            logger.exception(f"Dropped {len(events)} analytics events")
+            return 0
+        self._push_trend_deltas(events)
+        return len(events)
+
+    @staticmethod
+    def _push_trend_deltas(events):
+        from .trends import record_trend_event
+        from .utils import SEARCH_INTERACTIONS
+
+        searched = [event.food_item_id for event in events if event.interaction_type in SEARCH_INTERACTIONS]
+        if not searched:
+            return
+        try:
+            record_trend_event('search', searched)
+        except Exception:
+            # The events are stored, so the next full recompute still counts them
+            logger.exception(f"Trend deltas of {len(searched)} analytics events not applied")
+
+
+analytics_buffer = AnalyticsBuffer()
+atexit.register(analytics_buffer.flush)
+
+
+def record_interactions(interaction_type, item_ids, created_at=None):
+    """Log one interaction per item id (repeats allowed) through the write-behind buffer."""
+    analytics_buffer.record(interaction_type, item_ids, created_at)
+
+
+def floor_hour(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def interaction_counts(interaction_types=None, since=None, until=None, **filters):
+    """
+    {food_item_id: count} of interactions in [since, until), from rollups and raw rows.
+    Extra keyword filters apply to both tables (e.g. food_item__restaurant_id=3).
+    """
+    raw = FoodAnalytics.objects.filter(**filters)
+    hourly = FoodAnalyticsHourly.objects.filter(**filters)
+    if interaction_types is not None:
+        raw = raw.filter(interaction_type__in=interaction_types)
+        hourly = hourly.filter(interaction_type__in=interaction_types)
+    if since is not None:
+        raw = raw.filter(created_at__gte=since)
+        hourly = hourly.filter(hour__gte=since)
+    if until is not None:
+        raw = raw.filter(created_at__lt=until)
+        hourly = hourly.filter(hour__lt=until)
+
+    counts = defaultdict(int)
+    for item_id, n in hourly.values('food_item_id').annotate(n=Sum('count')).values_list('food_item_id', 'n'):
+        counts[item_id] += n
+    for item_id, n in raw.values('food_item_id').annotate(n=Count('id')).values_list('food_item_id', 'n'):
+        counts[item_id] += n
+    return dict(counts)
+
+
+def _fold(rows):
+    """Add {(food_item_id, interaction_type, hour): n} into the rollup table."""
+    existing = {
+        (row.food_item_id, row.interaction_type, row.hour): row
+        for row in FoodAnalyticsHourly.objects.select_for_update().filter(
+            food_item_id__in={key[0] for key in rows},
+            hour__in={key[2] for key in rows},
+        )
+    }
+    to_update, to_create = [], []
+    for key, n in rows.items():
+        if key in existing:
+            existing[key].count += n
+            to_update.append(existing[key])
+        else:
+            to_create.append(FoodAnalyticsHourly(food_item_id=key[0], interaction_type=key[1], hour=key[2], count=n))
+    FoodAnalyticsHourly.objects.bulk_update(to_update, ['count'], batch_size=2000)
+    FoodAnalyticsHourly.objects.bulk_create(to_create, batch_size=2000)
+
+
+def compact_analytics(before=None, chunk_size=50000):
+    """
+    Fold raw FoodAnalytics rows created before `before` (default: the start of the
+    current hour) into hourly rollups and delete them, chunk_size raw rows per
+    transaction. Returns the number of raw rows folded.
+    """
+    analytics_buffer.flush()  # Events buffered in this process count too
+    before = floor_hour(before or timezone.now())
+    pending = FoodAnalytics.objects.filter(created_at__lt=before).order_by('id')
+    folded = 0
+
+    while True:
+        last_id = pending.values_list('id', flat=True)[chunk_size - 1:chunk_size].first()
+        if last_id is None:
+            last_id = pending.aggregate(last=Max('id'))['last']
+            if last_id is None:
+                break
+        chunk = pending.filter(id__lte=last_id)
+
+        with transaction.atomic():
+            rows = {
+                (item_id, interaction_type, hour): n
+                for item_id, interaction_type, hour, n in chunk
+                .annotate(bucket=TruncHour('created_at', tzinfo=dt_timezone.utc))
+                .values('food_item_id', 'interaction_type', 'bucket')
+                .annotate(n=Count('id'))
+                .values_list('food_item_id', 'interaction_type', 'bucket', 'n')
+                .order_by()
+            }
+            _fold(rows)
+            deleted, _ = chunk.delete()
+        folded += deleted
+
+    print(f"✅ Analytics Compacted: {folded} raw events folded into hourly rollups")
+    return folded
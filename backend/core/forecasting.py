@@ -0,0 +1,289 @@
+"""
+🧠 Demand forecasting from order history.
+
+Orders are binned by hour of the week (0 = Monday 00:00 local time, 167 = Sunday
+23:00). A restaurant's seasonal profile is the average number of orders seen in
+each of those 168 slots over the last DEMAND_HISTORY_WEEKS weeks, computed with
+np.bincount. The forecast for an upcoming hour is the profile value of its slot.
+
+Profiles are cached per restaurant as (slot counts, observed span). New orders
+add one to their slot in the cached counts (see signals), so a request only reads
+the cache and does 168-element arithmetic. The counts are rebuilt from the
+database every DEMAND_PROFILE_REBUILD seconds so old weeks slide out.
+
+Kitchen prep forecasts apply the same profiles per dish: build_prep_forecasts()
+bins every ordered item of every restaurant into one (dishes x 168) matrix and
+stores the top dishes of each restaurant's next service in PrepForecast. It runs
+from `manage.py build_prep_forecasts` or the 'prep_forecasts' background job, never
+inside a request.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import FoodItem, Order, PrepForecast, Restaurant
+
+logger = logging.getLogger('core.forecasting')
+
+HOURS_PER_WEEK = 168
+# Hour-of-week of the Unix epoch (1970-01-01 was a Thursday)
+EPOCH_HOUR_OF_WEEK = 3 * 24
+
+
+def _history_weeks():
+    return getattr(settings, 'DEMAND_HISTORY_WEEKS', 8)
+
+
+def _utc_offset_hours(now=None):
+    offset = timezone.localtime(now or timezone.now()).utcoffset() or timedelta(0)
+    return offset.total_seconds() / 3600
+
+
+def to_local_hours(timestamps, offset_hours):
+    """Epoch seconds -> whole local hours since the epoch."""
+    return np.floor(np.asarray(timestamps, dtype=float) / 3600 + offset_hours).astype(np.int64)
+
+
+def hour_of_week(local_hours):
+    return (np.asarray(local_hours) + EPOCH_HOUR_OF_WEEK) % HOURS_PER_WEEK
+
+
+def slot_occurrences(start_hour, end_hour):
+    """How many times each hour-of-week slot occurs in local hours [start_hour, end_hour)."""
+    span = max(end_hour - start_hour, 0)
+    occurrences = np.full(HOURS_PER_WEEK, span // HOURS_PER_WEEK, dtype=float)
+    remainder = hour_of_week(np.arange(start_hour, start_hour + span % HOURS_PER_WEEK))
+    np.add.at(occurrences, remainder, 1)
+    return occurrences
+
+
+def slot_occurrences_many(start_hours, end_hour):
+    """slot_occurrences() for several start hours at once: one row of 168 per start hour."""
+    spans = np.maximum(end_hour - np.asarray(start_hours, dtype=np.int64), 0)
+    # Slot s occurs once more than the full weeks if it falls in the leftover hours
+    distance = (np.arange(HOURS_PER_WEEK)[None, :] - hour_of_week(start_hours)[:, None]) % HOURS_PER_WEEK
+    return (spans // HOURS_PER_WEEK)[:, None] + (distance < (spans % HOURS_PER_WEEK)[:, None])
+
+
+def seasonal_profile(counts, start_hour, end_hour):
+    """Average per slot: counts / number of times the slot was observed."""
+    occurrences = slot_occurrences(start_hour, end_hour)
+    return np.divide(counts, occurrences, out=np.zeros(HOURS_PER_WEEK), where=occurrences > 0)
+
+
+def _profile_key(restaurant_id):
+    return f"demand:profile:{restaurant_id}"
+
+
+def build_profile_state(restaurant_id, now=None):
+    """Slot counts of the restaurant's orders over the history window (one query)."""
+    now = now or timezone.now()
+    offset = _utc_offset_hours(now)
+    since = now - timedelta(weeks=_history_weeks())
+    timestamps = [
+        created_at.timestamp()
+        for created_at in Order.objects.filter(restaurant_id=restaurant_id, created_at__gte=since)
+        .values_list('created_at', flat=True).iterator(chunk_size=5000)
+    ]
+    hours = to_local_hours(timestamps, offset)
+    counts = np.bincount(hour_of_week(hours), minlength=HOURS_PER_WEEK).astype(float)
+    start_hour = int(hours.min()) if len(hours) else int(to_local_hours([now.timestamp()], offset)[0])
+    return {
+        'counts': counts,
+        'start_hour': start_hour,
+        'offset': offset,
+        'built_at': time.time(),
+    }
+
+
+def get_profile_state(restaurant_id):
+    state = cache.get(_profile_key(restaurant_id))
+    if state is None or time.time() - state['built_at'] > getattr(settings, 'DEMAND_PROFILE_REBUILD', 86400):
+        state = build_profile_state(restaurant_id)
+        cache.set(_profile_key(restaurant_id), state, timeout=None)
+    return state
+
+
+def record_order(restaurant_id, created_at):
+    """Add a new order to the cached profile (called on Order creation)."""
+    key = _profile_key(restaurant_id)
+    state = cache.get(key)
+    if state is None:
+        return  # Built lazily on the next forecast
+    hour = int(to_local_hours([created_at.timestamp()], state['offset'])[0])
+    state['counts'][hour_of_week(hour)] += 1
+    state['start_hour'] = min(state['start_hour'], hour)
+    cache.set(key, state, timeout=None)
+
+
+def _hour_start(local_hour, offset):
+    """Local hours since the epoch -> aware datetime in the local UTC offset."""
+    return datetime.fromtimestamp((int(local_hour) - offset) * 3600, tz=dt_timezone(timedelta(hours=offset)))
+
+
+def forecast_restaurant(restaurant_id, hours=24, now=None):
+    """
+    Expected orders for each of the next `hours` hours, plus the peak window.
+    Returns a dict with 'hourly' [{'hour', 'expected_orders'}], 'expected_total',
+    'typical_daily' (average orders per day) and 'peak_hours' (best 3-hour window).
+    """
+    now = now or timezone.now()
+    state = get_profile_state(restaurant_id)
+    offset = state['offset']
+    current_hour = int(to_local_hours([now.timestamp()], offset)[0])
+    profile = seasonal_profile(state['counts'], state['start_hour'], current_hour + 1)
+
+    upcoming = np.arange(current_hour + 1, current_hour + 1 + hours)
+    expected = profile[hour_of_week(upcoming)]
+
+    # Best 3 consecutive hours (by expected orders) within the horizon
+    window = min(3, hours)
+    sums = np.convolve(expected, np.ones(window), mode='valid')
+    peak_start = int(np.argmax(sums)) if sums.size and sums.max() > 0 else None
+
+    peak_hours = None
+    if peak_start is not None:
+        first = _hour_start(upcoming[peak_start], offset)
+        peak_hours = f"{first:%H:%M} - {first + timedelta(hours=window):%H:%M}"
+
+    return {
+        'hourly': [
+            {'hour': _hour_start(local_hour, offset).isoformat(), 'expected_orders': round(float(value), 2)}
+            for local_hour, value in zip(upcoming.tolist(), expected.tolist())
+        ],
+        'expected_total': round(float(expected.sum()), 2),
+        'typical_daily': round(float(profile.sum() / 7), 2),
+        'peak_hours': peak_hours,
+        'history_weeks': _history_weeks(),
+    }
+
+
+# --- Kitchen prep forecasts ---------------------------------------------------
+
+def build_prep_forecasts(restaurant_ids=None, hours=None, top=None, now=None, batch_size=1000):
+    """
+    Forecast the units of every available dish for each hour of the next service
+    (the next `hours` hours) and store the `top` dishes per restaurant, ranked by
+    expected prep minutes (units x preparation_time), in PrepForecast.
+    A dish's profile is averaged over its restaurant's observed history, like
+    forecast_restaurant(). Returns a report with row counts and timings.
+    """
+    now = now or timezone.now()
+    hours = hours or getattr(settings, 'PREP_FORECAST_HOURS', 12)
+    top = top or getattr(settings, 'PREP_FORECAST_TOP_ITEMS', 10)
+    offset = _utc_offset_hours(now)
+    timings = {}
+    started = time.perf_counter()
+
+    # 1. Load: one row per ordered item, plus the available menu
+    lines = Order.items.through.objects.filter(order__created_at__gte=now - timedelta(weeks=_history_weeks()))
+    menu = FoodItem.objects.filter(is_available=True)
+    restaurants = Restaurant.objects.all()
+    if restaurant_ids is not None:
+        lines = lines.filter(order__restaurant_id__in=restaurant_ids)
+        menu = menu.filter(restaurant_id__in=restaurant_ids)
+        restaurants = restaurants.filter(id__in=restaurant_ids)
+    rows = list(lines.values_list('order__restaurant_id', 'fooditem_id', 'order__created_at').iterator(chunk_size=5000))
+    dishes = list(menu.order_by('id').values_list('id', 'restaurant_id', 'name', 'preparation_time').iterator(chunk_size=5000))
+    restaurant_ids = list(restaurants.order_by('id').values_list('id', flat=True))
+    timings['load'] = time.perf_counter() - started
+
+    # 2. Forecast
+    phase_started = time.perf_counter()
+    current_hour = int(to_local_hours([now.timestamp()], offset)[0])
+    upcoming = np.arange(current_hour + 1, current_hour + 1 + hours)
+    restaurant_array = np.array(restaurant_ids, dtype=np.int64)
+    dish_ids = np.array([dish[0] for dish in dishes], dtype=np.int64)
+    dish_restaurants = np.searchsorted(restaurant_array, np.array([dish[1] for dish in dishes], dtype=np.int64))
+    prep_times = np.array([dish[3] for dish in dishes], dtype=float)
+
+    line_restaurants = np.searchsorted(restaurant_array, np.array([row[0] for row in rows], dtype=np.int64))
+    line_items = np.array([row[1] for row in rows], dtype=np.int64)
+    line_hours = to_local_hours([row[2].timestamp() for row in rows], offset)
+
+    # History of each restaurant starts at its first order in the window
+    start_hours = np.full(len(restaurant_ids), current_hour + 1, dtype=np.int64)
+    np.minimum.at(start_hours, line_restaurants, line_hours)
+    occurrences = slot_occurrences_many(start_hours, current_hour + 1)[dish_restaurants]
+
+    # Lines of unavailable (or deleted) dishes only count towards the restaurant's history
+    positions = np.minimum(np.searchsorted(dish_ids, line_items), max(len(dish_ids) - 1, 0))
+    known = (dish_ids[positions] == line_items) if len(dish_ids) else np.zeros(len(rows), dtype=bool)
+    counts = np.bincount(
+        positions[known] * HOURS_PER_WEEK + hour_of_week(line_hours[known]),
+        minlength=len(dishes) * HOURS_PER_WEEK,
+    ).reshape(len(dishes), HOURS_PER_WEEK)
+    profiles = np.divide(counts, occurrences, out=np.zeros(counts.shape), where=occurrences > 0)
+
+    expected = profiles[:, hour_of_week(upcoming)]  # dishes x hours
+    units = expected.sum(axis=1)
+    minutes = units * prep_times
+    peaks = upcoming[np.argmax(expected, axis=1)]
+    hourly_minutes = np.zeros((len(restaurant_ids), hours))
+    np.add.at(hourly_minutes, dish_restaurants, expected * prep_times[:, None])
+
+    # Rank dishes within each restaurant: most prep minutes first, then id
+    order = np.lexsort((dish_ids, -minutes, dish_restaurants))
+    order = order[units[order] > 0]
+    boundaries = np.searchsorted(dish_restaurants[order], np.arange(len(restaurant_ids) + 1))
+    hour_starts = [_hour_start(local_hour, offset) for local_hour in upcoming.tolist()]
+    forecasts = []
+    for index, restaurant_id in enumerate(restaurant_ids):
+        items = []
+        for position in order[boundaries[index]:boundaries[index + 1]][:top].tolist():
+            dish_id, _, name, prep_time = dishes[position]
+            peak = _hour_start(peaks[position], offset)
+            items.append({
+                'id': dish_id,
+                'name': name,
+                'preparation_time': prep_time,
+                'expected_units': round(float(units[position]), 2),
+                'prep_minutes': round(float(minutes[position]), 1),
+                'hourly': [round(value, 2) for value in expected[position].tolist()],
+                'peak_hour': peak.isoformat(),
+                # Ready for the busiest hour
+                'prep_by': (peak - timedelta(minutes=prep_time)).isoformat(),
+            })
+        forecasts.append(PrepForecast(
+            restaurant_id=restaurant_id,
+            service_start=hour_starts[0],
+            hours=[hour.isoformat() for hour in hour_starts],
+            prep_minutes=[round(value, 1) for value in hourly_minutes[index].tolist()],
+            items=items,
+            computed_at=now,
+        ))
+    timings['forecast'] = time.perf_counter() - phase_started
+
+    # 3. Write
+    phase_started = time.perf_counter()
+    PrepForecast.objects.bulk_create(
+        forecasts, batch_size=batch_size, update_conflicts=True, unique_fields=['restaurant'],
+        update_fields=['service_start', 'hours', 'prep_minutes', 'items', 'computed_at'],
+    )
+    timings['write'] = time.perf_counter() - phase_started
+    timings['total'] = time.perf_counter() - started
+
+    report = {
+        'restaurants': len(forecasts),
+        'dishes': len(dishes),
+        'order_lines': len(rows),
+        'timings': {phase: round(seconds, 3) for phase, seconds in timings.items()},
+    }
+    logger.info(
+        f"Prep forecasts built for {len(forecasts)} restaurants ({len(dishes)} dishes, {len(rows)} order lines) "
+        f"in {timings['total']:.2f}s (load {timings['load']:.2f}s, forecast {timings['forecast']:.2f}s, "
+        f"write {timings['write']:.2f}s)"
+    )
+    return report
+
+
+def prep_forecast_is_stale(forecast, now=None):
+    """Older than PREP_FORECAST_MAX_AGE, or its service is over."""
+    now = now or timezone.now()
+    max_age = timedelta(seconds=getattr(settings, 'PREP_FORECAST_MAX_AGE', 21600))
+    return forecast.computed_at < now - max_age or forecast.service_start + timedelta(hours=len(forecast.hours)) <= now
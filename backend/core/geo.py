@@ -0,0 +1,185 @@
+"""
+Geo helpers for location based search.
+
+Restaurants store a geohash of their coordinates (see ``Restaurant.geohash``).
+Every geohash prefix is a rectangular cell, so "all restaurants inside cell X"
+is a simple indexed range scan: ``X <= geohash < X + '{'``.
+"""
+from math import cos, floor, isfinite, radians
+
+import numpy as np
+from django.conf import settings
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Every base32 character sorts before '{', so [cell, cell + '{') is the prefix range
+PREFIX_END = '{'
+
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m cells
+MAX_COVERING_CELLS = 32
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Encode a coordinate pair into a geohash string."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def check_search_params(lat, lng, radius_km, max_radius_km=None):
+    """
+    Raise ValueError unless (lat, lng) is a real coordinate and radius_km a positive
+    distance of at most max_radius_km (default GEO_MAX_RADIUS_KM).
+    """
+    if max_radius_km is None:
+        max_radius_km = getattr(settings, 'GEO_MAX_RADIUS_KM', 100)
+    if not all(isfinite(value) for value in (lat, lng, radius_km)):
+        raise ValueError("Latitude, longitude and radius must be finite numbers.")
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        raise ValueError("Latitude must be within [-90, 90] and longitude within [-180, 180].")
+    if not 0 < radius_km <= max_radius_km:
+        raise ValueError(f"Radius must be greater than 0 and at most {max_radius_km:g} km.")
+
+
+def cell_size(precision):
+    """Return (lat_degrees, lng_degrees) of a geohash cell at the given precision."""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(lat, lng, radius_km):
+    """Return (lat_min, lat_max, lng_min, lng_max) enclosing a circle around a point."""
+    lat_delta = radius_km / KM_PER_DEGREE
+    # Longitude degrees shrink with cos(lat); clamp so the poles don't divide by zero.
+    # A box 360 degrees wide already spans every longitude, so huge radii stay bounded
+    lng_delta = min(radius_km / (KM_PER_DEGREE * max(cos(radians(lat)), 0.01)), 180.0)
+    if lat + lat_delta >= 90.0 or lat - lat_delta <= -90.0:
+        lng_delta = 180.0 # The circle contains a pole: every longitude is in range
+    return (
+        max(lat - lat_delta, -90.0),
+        min(lat + lat_delta, 90.0),
+        lng - lng_delta,
+        lng + lng_delta,
+    )
+
+
+def _cell_span(lo, hi, size, offset):
+    return int(floor((hi + offset) / size)) - int(floor((lo + offset) / size)) + 1
+
+
+def covering_cells(lat, lng, radius_km, max_cells=MAX_COVERING_CELLS):
+    """
+    Return the geohash cells that fully cover a circle of radius_km around (lat, lng).
+    Picks the finest precision that needs at most max_cells cells; radii larger
+    than the globe fall back to the (at most 32) precision-1 cells.
+    """
+    lat_min, lat_max, lng_min, lng_max = bounding_box(lat, lng, radius_km)
+
+    precision = 1
+    for p in range(1, GEOHASH_PRECISION + 1):
+        lat_size, lng_size = cell_size(p)
+        count = _cell_span(lat_min, lat_max, lat_size, 90.0) * _cell_span(lng_min, lng_max, lng_size, 180.0)
+        if count > max_cells:
+            break
+        precision = p
+
+    lat_size, lng_size = cell_size(precision)
+    first_row = int(floor((lat_min + 90.0) / lat_size))
+    first_col = int(floor((lng_min + 180.0) / lng_size))
+    rows = _cell_span(lat_min, lat_max, lat_size, 90.0)
+    cols = _cell_span(lng_min, lng_max, lng_size, 180.0)
+
+    cells = set()
+    for row in range(first_row, first_row + rows):
+        cell_lat = min(-90.0 + (row + 0.5) * lat_size, 90.0)
+        for col in range(first_col, first_col + cols):
+            # Wrap around the antimeridian
+            cell_lng = (-180.0 + (col + 0.5) * lng_size + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(cell_lat, cell_lng, precision))
+    return sorted(cells)
+
+
+def geohash_q(cells, field='geohash'):
+    """Build a Q object matching rows whose geohash falls inside any of the cells."""
+    query = Q()
+    for cell in cells:
+        query |= Q(**{f'{field}__gte': cell, f'{field}__lt': cell + PREFIX_END})
+    return query
+
+
+def bounding_box_q(lat, lng, radius_km, lat_field='latitude', lng_field='longitude'):
+    """Build a Q object matching rows inside the circle's bounding box (split at the antimeridian)."""
+    lat_min, lat_max, lng_min, lng_max = bounding_box(lat, lng, radius_km)
+    query = Q(**{f'{lat_field}__gte': lat_min, f'{lat_field}__lte': lat_max})
+    if lng_max - lng_min >= 360.0:
+        return query
+    if lng_min < -180.0:
+        lng_q = Q(**{f'{lng_field}__gte': lng_min + 360.0}) | Q(**{f'{lng_field}__lte': lng_max})
+    elif lng_max > 180.0:
+        lng_q = Q(**{f'{lng_field}__gte': lng_min}) | Q(**{f'{lng_field}__lte': lng_max - 360.0})
+    else:
+        lng_q = Q(**{f'{lng_field}__gte': lng_min, f'{lng_field}__lte': lng_max})
+    return query & lng_q
+
+
+def distance_expression(lat, lng, lat_field='latitude', lng_field='longitude'):
+    """Haversine distance (km) from (lat, lng) as a database expression, for annotate()/order_by()."""
+    dlat = Radians(F(lat_field) - Value(lat)) / 2
+    dlng = Radians(F(lng_field) - Value(lng)) / 2
+    a = Power(Sin(dlat), 2) + Value(cos(radians(lat))) * Cos(Radians(F(lat_field))) * Power(Sin(dlng), 2)
+    return ExpressionWrapper(2 * EARTH_RADIUS_KM * ASin(Sqrt(a)), output_field=FloatField())
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Vectorized Haversine distance (km) from one point to arrays of points."""
+    lat1 = np.radians(lat)
+    lats = np.radians(np.asarray(lats, dtype=float))
+    dlat = lats - lat1
+    dlng = np.radians(np.asarray(lngs, dtype=float)) - np.radians(lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lats) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearby(lat, lng, radius_km, rows):
+    """
+    Filter (id, latitude, longitude) rows to those within radius_km of (lat, lng).
+    Designed for ``queryset.values_list('id', 'latitude', 'longitude')``; rows with
+    missing coordinates are skipped. Returns (ids, distances) sorted by distance.
+    """
+    rows = list(rows)
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    coords = np.array([row[1:3] for row in rows], dtype=float)  # None -> nan
+    distances = haversine_km(lat, lng, coords[:, 0], coords[:, 1])
+
+    keep = np.flatnonzero(distances <= radius_km)  # nan compares False
+    order = keep[np.argsort(distances[keep], kind='stable')]
+    return ids[order], distances[order]
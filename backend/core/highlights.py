@@ -0,0 +1,82 @@
+"""
+Cached snapshot behind /api/smart-highlights/.
+
+The trending, fast-selling and top-rated lists are computed together and cached
+as one serialized payload. It is recomputed when it is older than
+SMART_HIGHLIGHTS_TTL seconds, or when trend scores or stock changed since it was
+built (mark_highlights_stale), but at most every SMART_HIGHLIGHTS_MIN_REFRESH
+seconds. Refreshes are stale-while-revalidate: one request takes a cache.add lock
+and recomputes, every other request keeps getting the previous snapshot.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import FoodItem
+from .trends import trend_rank_field
+
+SNAPSHOT_KEY = 'highlights:snapshot'
+DIRTY_KEY = 'highlights:dirty'
+LOCK_KEY = 'highlights:lock'
+LOCK_TIMEOUT = 30
+HIGHLIGHT_COUNT = 5
+
+
+def mark_highlights_stale():
+    """Called when trend scores or stock change."""
+    cache.set(DIRTY_KEY, time.time(), timeout=None)
+
+
+def compute_highlights(serialize):
+    """
+    Build the payload; serialize(items) returns the response data for a list of
+    items and loads whatever related rows it needs.
+    """
+    available = FoodItem.objects.filter(is_available=True)
+    lists = {
+        # 1. Trending
+        'trending': available.order_by(f'-{trend_rank_field()}', 'id'),
+        # 2. Fast Selling (Quantity < 20 and Popular)
+        'fast_selling': available.filter(quantity_available__lt=20, quantity_available__gt=0).order_by('-popularity_score', 'id'),
+        # 3. Top Rated (popularity_score as proxy since FoodItem has no direct rating)
+        'top_rated': available.order_by('-popularity_score', 'id'),
+    }
+    ids = {name: list(queryset.values_list('id', flat=True)[:HIGHLIGHT_COUNT]) for name, queryset in lists.items()}
+
+    # Each item is loaded and serialized once even if it appears in several lists
+    unique_ids = {item_id for item_ids in ids.values() for item_id in item_ids}
+    items = FoodItem.objects.in_bulk(unique_ids)
+    data = dict(zip(
+        [item_id for item_id in unique_ids if item_id in items],
+        serialize([items[item_id] for item_id in unique_ids if item_id in items]),
+    ))
+    return {name: [data[item_id] for item_id in item_ids if item_id in data] for name, item_ids in ids.items()}
+
+
+def get_highlights(serialize):
+    ttl = getattr(settings, 'SMART_HIGHLIGHTS_TTL', 60)
+    min_refresh = getattr(settings, 'SMART_HIGHLIGHTS_MIN_REFRESH', 5)
+    values = cache.get_many([SNAPSHOT_KEY, DIRTY_KEY])
+    snapshot = values.get(SNAPSHOT_KEY)
+    now = time.time()
+
+    if snapshot is not None:
+        age = now - snapshot['computed_at']
+        dirty = values.get(DIRTY_KEY, 0) > snapshot['computed_at']
+        if age < ttl and not (dirty and age >= min_refresh):
+            return snapshot['data']
+    owns_lock = cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT)
+    if snapshot is not None and not owns_lock:
+        return snapshot['data']  # Someone else is refreshing, serve the stale copy
+
+    # Cold cache: compute even without the lock
+    try:
+        computed_at = time.time()
+        data = compute_highlights(serialize)
+        # Kept well past the TTL so there is always something to serve while refreshing
+        cache.set(SNAPSHOT_KEY, {'computed_at': computed_at, 'data': data}, timeout=max(ttl * 60, 3600))
+    finally:
+        if owns_lock:
+            cache.delete(LOCK_KEY)
+    return data
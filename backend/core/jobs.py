@@ -0,0 +1,189 @@
+"""
+Database-backed background jobs.
+
+Views enqueue work with enqueue(); `manage.py run_jobs` workers claim and run it.
+- De-duplication: while a job is queued or running its dedupe_key holds the job
+  kind (unique column), so concurrent requests collapse into the same job.
+- Cross-process locking: job_lock() uses the JobLock table, so only one node
+  runs a given recomputation at a time even with several workers/app servers.
+- Leases: a job's lock and its updated_at expire after JOB_STALE_AFTER, and both
+  are renewed on every progress() call, so long handlers must report progress
+  regularly (e.g. per batch).
+"""
+import os
+import socket
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import BackgroundJob, JobLock
+
+
+class JobLockBusy(Exception):
+    pass
+
+
+def _stale_after():
+    return timedelta(seconds=getattr(settings, 'JOB_STALE_AFTER', 1800))
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# --- Locks --------------------------------------------------------------------
+
+def acquire_lock(name, owner, ttl=None):
+    """Try to take the named lock; returns True on success. Expired locks are taken over."""
+    ttl = ttl or _stale_after()
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            JobLock.objects.create(name=name, owner=owner, expires_at=now + ttl)
+        return True
+    except IntegrityError:
+        # Held by someone: only succeed if their lease has expired
+        taken = JobLock.objects.filter(name=name, expires_at__lt=now).update(owner=owner, expires_at=now + ttl)
+        return taken == 1
+
+
+def renew_lock(name, owner, ttl=None):
+    """Extend a held lock's lease; returns False if it expired and was taken over."""
+    ttl = ttl or _stale_after()
+    return JobLock.objects.filter(name=name, owner=owner).update(expires_at=timezone.now() + ttl) == 1
+
+
+def release_lock(name, owner):
+    JobLock.objects.filter(name=name, owner=owner).delete()
+
+
+@contextmanager
+def job_lock(name, ttl=None):
+    """
+    Hold a cross-process lock for the duration of the block, or raise JobLockBusy.
+    Yields renew(), which extends the lease and returns False if it was lost.
+    """
+    owner = f"{worker_name()}:{uuid.uuid4().hex[:8]}"
+    if not acquire_lock(name, owner, ttl):
+        raise JobLockBusy(f"{name} is already running on another worker")
+
+    def renew():
+        return renew_lock(name, owner, ttl)
+
+    try:
+        yield renew
+    finally:
+        release_lock(name, owner)
+
+
+# --- Queue --------------------------------------------------------------------
+
+def _expire_stale(kind):
+    """Fail jobs whose worker stopped reporting, so they no longer block new ones."""
+    BackgroundJob.objects.filter(
+        kind=kind, status__in=['queued', 'running'], updated_at__lt=timezone.now() - _stale_after()
+    ).update(status='failed', message='Timed out', dedupe_key=None, finished_at=timezone.now())
+
+
+def enqueue(kind, user=None):
+    """
+    Queue a job of the given kind, or return the one already queued/running.
+    Returns (job, created).
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    _expire_stale(kind)
+    try:
+        with transaction.atomic():
+            job = BackgroundJob.objects.create(kind=kind, dedupe_key=kind, requested_by=user)
+        return job, True
+    except IntegrityError:
+        job = BackgroundJob.objects.filter(dedupe_key=kind).first()
+        if job is None:
+            # Finished between our insert and lookup, try once more
+            return enqueue(kind, user)
+        return job, False
+
+
+def _claim_next(worker):
+    for job in BackgroundJob.objects.filter(status='queued').order_by('created_at')[:10]:
+        # Conditional update: only one worker can move a job from queued to running
+        claimed = BackgroundJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running', worker=worker, started_at=timezone.now(), updated_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_next(worker=None):
+    """Claim and run the oldest queued job. Returns the job, or None if the queue is empty."""
+    worker = worker or worker_name()
+    job = _claim_next(worker)
+    if job is None:
+        return None
+
+    renew = None
+
+    def progress(percent, message=''):
+        # Doubles as the heartbeat: keeps the job out of _expire_stale and renews the lock
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            progress=round(percent, 1), message=message[:255], updated_at=timezone.now()
+        )
+        if renew is not None and not renew():
+            raise JobLockBusy(f"Lost the job:{job.kind} lock (lease expired)")
+
+    started = time.perf_counter()
+    try:
+        with job_lock(f"job:{job.kind}") as renew:
+            result = JOB_HANDLERS[job.kind](progress)
+        job.status = 'succeeded'
+        job.progress = 100.0
+        job.message = f"Finished in {time.perf_counter() - started:.2f}s"
+        job.result = result
+    except Exception as exc:
+        job.status = 'failed'
+        job.message = str(exc)[:255]
+        job.result = {'traceback': traceback.format_exc()}
+
+    job.dedupe_key = None
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+# --- Handlers -----------------------------------------------------------------
+
+def refresh_trends(progress):
+    from .trends import compact_trend_scores
+    from .utils import calculate_trending_reels
+
+    progress(0, 'Updating trend scores')
+    trend_report = compact_trend_scores(progress=lambda percent, message='': progress(percent / 2, message))
+    progress(50, 'Updating trending reels')
+    reels_report = calculate_trending_reels()
+    progress(100, 'Done')
+    return {'trend_scores': trend_report, 'trending_reels': reels_report}
+
+
+def prep_forecasts(progress):
+    from .forecasting import build_prep_forecasts
+
+    progress(0, 'Building prep forecasts')
+    report = build_prep_forecasts()
+    progress(100, 'Done')
+    return report
+
+
+JOB_HANDLERS = {
+    'refresh_trends': refresh_trends,
+    'prep_forecasts': prep_forecasts,
+}
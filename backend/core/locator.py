@@ -0,0 +1,174 @@
+"""
+In-process spatial index of open restaurants.
+
+Each worker process lazily builds a read-only BallTree (haversine metric) over the
+coordinates of open restaurants. Changes made in this process arrive through the
+Restaurant post_save/post_delete signals and are applied incrementally: stale tree
+entries are masked out and new positions are kept in a small overlay that is
+scanned with NumPy. Once the overlay grows past REBUILD_THRESHOLD, or the tree is
+older than RESTAURANT_LOCATOR_MAX_AGE seconds (so changes made by other workers
+are picked up), the tree is rebuilt on the next query.
+"""
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from sklearn.neighbors import BallTree
+
+from .geo import EARTH_RADIUS_KM, covering_cells, geohash_q, haversine_km, nearby
+
+REBUILD_THRESHOLD = 256
+
+
+class _Snapshot:
+    """Immutable view of the index; queries never take the lock."""
+
+    def __init__(self, tree, ids, positions, masked, overlay, built_at):
+        self.tree = tree
+        self.ids = ids
+        self.positions = positions  # id -> (lat, lng) as indexed in the tree
+        self.masked = masked  # ids whose tree entry is stale
+        self.overlay = overlay  # id -> (lat, lng) added or moved since the build
+        self.built_at = built_at
+        self.overlay_ids = np.fromiter(overlay.keys(), dtype=np.int64, count=len(overlay))
+        coords = np.array(list(overlay.values()), dtype=float).reshape(-1, 2)
+        self.overlay_lats = coords[:, 0]
+        self.overlay_lngs = coords[:, 1]
+        self.masked_ids = np.fromiter(masked, dtype=np.int64, count=len(masked))
+
+    @property
+    def pending(self):
+        return len(self.masked) + len(self.overlay)
+
+
+class RestaurantLocator:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    # --- Building -----------------------------------------------------------
+
+    def _build(self):
+        from .models import Restaurant
+
+        rows = Restaurant.objects.filter(
+            is_open=True, latitude__isnull=False, longitude__isnull=False
+        ).values_list('id', 'latitude', 'longitude')
+        rows = list(rows)
+
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        coords = np.radians(np.array([row[1:3] for row in rows], dtype=float).reshape(-1, 2))
+        tree = BallTree(coords, metric='haversine') if len(rows) else None
+        positions = {row[0]: (row[1], row[2]) for row in rows}
+        return _Snapshot(tree, ids, positions, frozenset(), {}, time.monotonic())
+
+    def _current(self):
+        snapshot = self._snapshot
+        max_age = getattr(settings, 'RESTAURANT_LOCATOR_MAX_AGE', 300)
+        if snapshot is None or snapshot.pending > REBUILD_THRESHOLD or time.monotonic() - snapshot.built_at > max_age:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.pending > REBUILD_THRESHOLD or time.monotonic() - snapshot.built_at > max_age:
+                    snapshot = self._snapshot = self._build()
+        return snapshot
+
+    def invalidate(self):
+        """Drop the index; it is rebuilt on the next query."""
+        with self._lock:
+            self._snapshot = None
+
+    # --- Incremental updates (called from signals) --------------------------
+
+    def update(self, restaurant_id, latitude, longitude, is_open):
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return  # Not built yet, the lazy build will read the new state
+            is_indexed = is_open and latitude is not None and longitude is not None
+            if restaurant_id not in snapshot.masked and restaurant_id not in snapshot.overlay:
+                if snapshot.positions.get(restaurant_id) == ((latitude, longitude) if is_indexed else None):
+                    return  # Saved without touching location or is_open
+            masked = set(snapshot.masked)
+            masked.add(restaurant_id)
+            overlay = dict(snapshot.overlay)
+            if is_indexed:
+                overlay[restaurant_id] = (latitude, longitude)
+            else:
+                overlay.pop(restaurant_id, None)
+            self._snapshot = _Snapshot(
+                snapshot.tree, snapshot.ids, snapshot.positions, frozenset(masked), overlay, snapshot.built_at
+            )
+
+    def discard(self, restaurant_id):
+        self.update(restaurant_id, None, None, False)
+
+    # --- Queries ------------------------------------------------------------
+
+    def _merge(self, snapshot, tree_ids, tree_distances, lat, lng, radius_km=None):
+        if snapshot.masked:
+            keep = ~np.isin(tree_ids, snapshot.masked_ids)
+            tree_ids, tree_distances = tree_ids[keep], tree_distances[keep]
+
+        if len(snapshot.overlay):
+            overlay_distances = haversine_km(lat, lng, snapshot.overlay_lats, snapshot.overlay_lngs)
+            overlay_ids = snapshot.overlay_ids
+            if radius_km is not None:
+                keep = overlay_distances <= radius_km
+                overlay_ids, overlay_distances = overlay_ids[keep], overlay_distances[keep]
+            tree_ids = np.concatenate([tree_ids, overlay_ids])
+            tree_distances = np.concatenate([tree_distances, overlay_distances])
+
+        order = np.argsort(tree_distances, kind='stable')
+        return tree_ids[order], tree_distances[order]
+
+    def within(self, lat, lng, radius_km):
+        """Return (ids, distances_km) of open restaurants within radius_km, nearest first."""
+        snapshot = self._current()
+        ids = np.empty(0, dtype=np.int64)
+        distances = np.empty(0, dtype=float)
+
+        if snapshot.tree is not None:
+            point = np.radians([[lat, lng]])
+            indices, arc = snapshot.tree.query_radius(point, r=radius_km / EARTH_RADIUS_KM, return_distance=True)
+            ids = snapshot.ids[indices[0]]
+            distances = arc[0] * EARTH_RADIUS_KM
+
+        return self._merge(snapshot, ids, distances, lat, lng, radius_km)
+
+    def nearest(self, lat, lng, k=10):
+        """Return (ids, distances_km) of the k nearest open restaurants."""
+        snapshot = self._current()
+        ids = np.empty(0, dtype=np.int64)
+        distances = np.empty(0, dtype=float)
+
+        if snapshot.tree is not None:
+            # Ask for extra neighbours to make up for masked (stale) entries
+            count = min(k + len(snapshot.masked), len(snapshot.ids))
+            arc, indices = snapshot.tree.query(np.radians([[lat, lng]]), k=count)
+            ids = snapshot.ids[indices[0]]
+            distances = arc[0] * EARTH_RADIUS_KM
+
+        ids, distances = self._merge(snapshot, ids, distances, lat, lng)
+        return ids[:k], distances[:k]
+
+
+locator = RestaurantLocator()
+
+
+def restaurants_within(lat, lng, radius_km):
+    """
+    Return (ids, distances_km) of open restaurants within radius_km, nearest first.
+    Uses the in-memory index unless RESTAURANT_LOCATOR_ENABLED is off, in which case
+    the geohash cells covering the circle are scanned in the database.
+    """
+    if getattr(settings, 'RESTAURANT_LOCATOR_ENABLED', True):
+        return locator.within(lat, lng, radius_km)
+
+    from .models import Restaurant
+
+    rows = Restaurant.objects.filter(
+        geohash_q(covering_cells(lat, lng, radius_km)), is_open=True
+    ).values_list('id', 'latitude', 'longitude')
+    return nearby(lat, lng, radius_km, rows)
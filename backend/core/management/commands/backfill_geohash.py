@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.geo import encode_geohash
+from core.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = "Recompute Restaurant.geohash for rows created with bulk_create (which skips save())"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Recompute every row, not only missing ones")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        rows = Restaurant.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        if not options['all']:
+            rows = rows.filter(geohash='')
+
+        updated = 0
+        batch = []
+        for restaurant in rows.only('id', 'latitude', 'longitude').iterator(chunk_size=batch_size):
+            restaurant.geohash = encode_geohash(restaurant.latitude, restaurant.longitude)
+            batch.append(restaurant)
+            if len(batch) >= batch_size:
+                Restaurant.objects.bulk_update(batch, ['geohash'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            Restaurant.objects.bulk_update(batch, ['geohash'])
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Geohash updated for {updated} restaurants"))
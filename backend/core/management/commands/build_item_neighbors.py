@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.recommendations import NEIGHBORS_TOP_K, build_item_neighbors
+
+
+class Command(BaseCommand):
+    help = "Rebuild the top-K co-ordered neighbours of every food item from order baskets"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=NEIGHBORS_TOP_K, help="Neighbours kept per item")
+        parser.add_argument('--block-size', type=int, default=2000, help="Items per sparse product block")
+
+    def handle(self, *args, **options):
+        build_item_neighbors(top_k=options['top_k'], block_size=options['block_size'])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.forecasting import build_prep_forecasts
+
+
+class Command(BaseCommand):
+    help = "Build per-dish hourly prep forecasts of the next service for every restaurant (run before each shift, e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None, help="Hours in the service (default PREP_FORECAST_HOURS)")
+        parser.add_argument('--top', type=int, default=None, help="Dishes per restaurant (default PREP_FORECAST_TOP_ITEMS)")
+
+    def handle(self, *args, **options):
+        build_prep_forecasts(hours=options['hours'], top=options['top'])
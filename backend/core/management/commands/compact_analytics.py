@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.analytics import compact_analytics
+
+
+class Command(BaseCommand):
+    help = "Fold raw FoodAnalytics rows of finished hours into hourly rollups and delete them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50000, help="Raw rows per transaction")
+
+    def handle(self, *args, **options):
+        compact_analytics(chunk_size=options['chunk_size'])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.recommendations import RECOMMENDATION_COUNT, precompute_recommendations
+
+
+class Command(BaseCommand):
+    help = "Precompute recommendations for every customer who ordered recently (run nightly, e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Active window (default RECOMMENDATION_BATCH_DAYS)")
+        parser.add_argument('--count', type=int, default=RECOMMENDATION_COUNT, help="Recommendations per user")
+
+    def handle(self, *args, **options):
+        precompute_recommendations(days=options['days'], count=options['count'])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.trends import rebuild_decayed_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute decayed trend scores from the interaction history (run after switching TREND_SCORE_MODE or the half-life)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rebuild_decayed_scores(batch_size=options['batch_size'])
@@ -0,0 +1,26 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.trends import recompute_trend_scores_parallel
+
+
+class Command(BaseCommand):
+    help = "Fully recompute trend scores with a process pool, partitioned by restaurant-id ranges"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Restaurants per partition")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per bulk_update")
+
+    def handle(self, *args, **options):
+        report = recompute_trend_scores_parallel(
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+        )
+        for pid, stats in sorted(report['per_worker'].items()):
+            self.stdout.write(
+                f"  worker {pid}: {stats['partitions']} partitions, {stats['items_scanned']} items "
+                f"({stats['items_updated']} changed) in {stats['seconds']}s - {stats['items_per_second']} items/s"
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.sellout import refresh_sellout_estimates
+
+
+class Command(BaseCommand):
+    help = "Re-project indexed sell-out estimates with decayed order rates, clearing those of items that stopped selling (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per bulk_update")
+
+    def handle(self, *args, **options):
+        refresh_sellout_estimates(batch_size=options['batch_size'])
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import run_next, worker_name
+
+
+class Command(BaseCommand):
+    help = "Process queued background jobs (trend refreshes etc.)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit (for cron)")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to wait when the queue is empty")
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        self.stdout.write(f"🛠️ Job worker {worker} started")
+
+        while True:
+            job = run_next(worker)
+            if job is not None:
+                style = self.style.SUCCESS if job.status == 'succeeded' else self.style.ERROR
+                self.stdout.write(style(f"{job.kind} #{job.id}: {job.status} - {job.message}"))
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.training import generate_mock_analytics, show_results, train_popularity_scores
+
+
+class Command(BaseCommand):
+    help = "Train interaction-weighted popularity scores from FoodAnalytics (streamed in chunks)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--generate', type=int, default=0, help="Create this many mock interactions first")
+        parser.add_argument('--chunk-size', type=int, default=100000, help="Analytics rows read per query")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per bulk_update")
+        parser.add_argument('--show', action='store_true', help="Print the top foods and restaurants afterwards")
+
+    def handle(self, *args, **options):
+        if options['generate']:
+            self.stdout.write("🤖 AI Module: Generating User Interaction Data...")
+            generate_mock_analytics(options['generate'])
+
+        self.stdout.write("\n🧠 AI Training: Calculating Popularity Scores...")
+        train_popularity_scores(chunk_size=options['chunk_size'], batch_size=options['batch_size'])
+
+        if options['show']:
+            show_results()
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+def backfill_geohash(apps, schema_editor):
+    from core.geo import encode_geohash
+
+    Restaurant = apps.get_model('core', 'Restaurant')
+    batch = []
+    rows = Restaurant.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude')
+    for restaurant in rows.iterator(chunk_size=2000):
+        restaurant.geohash = encode_geohash(restaurant.latitude, restaurant.longitude)
+        batch.append(restaurant)
+        if len(batch) >= 2000:
+            Restaurant.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Restaurant.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_reel_image_reel_image_url_reel_is_video_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Derived from latitude/longitude for nearby search', max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_trendwindow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='decayed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='decayed_rank',
+            field=models.FloatField(db_index=True, default=-1000000000000000.0, help_text='Time-independent sort key for the decayed score'),
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='decayed_score',
+            field=models.FloatField(default=0.0, help_text='Decayed trend score as of decayed_at'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 20:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_background_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodAnalyticsHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interaction_type', models.CharField(max_length=20)),
+                ('hour', models.DateTimeField(db_index=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_analytics', to='core.fooditem')),
+            ],
+            options={
+                'unique_together': {('food_item', 'interaction_type', 'hour')},
+            },
+        ),
+    ]
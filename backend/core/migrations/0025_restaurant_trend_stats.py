@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 20:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_food_analytics_hourly'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantTrendStats',
+            fields=[
+                ('restaurant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend_stats', serialize=False, to='core.restaurant')),
+                ('city', models.CharField(db_index=True, max_length=200)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('avg_trend_score', models.FloatField(db_index=True, default=0.0)),
+                ('max_trend_score', models.FloatField(default=0.0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-avg_trend_score', 'restaurant_id'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 20:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_restaurant_trend_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTasteProfile',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='taste_profile', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('recent_orders', models.JSONField(default=list, help_text='Item ids of the latest orders, newest first')),
+                ('category_counts', models.JSONField(default=dict)),
+                ('cuisine_counts', models.JSONField(default=dict)),
+                ('top_category', models.CharField(blank=True, db_index=True, default='', max_length=50)),
+                ('top_cuisine', models.CharField(blank=True, db_index=True, default='', max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 20:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_user_taste_profile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodItemNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='core.fooditem')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.fooditem')),
+            ],
+            options={
+                'unique_together': {('food_item', 'rank')},
+            },
+        ),
+    ]
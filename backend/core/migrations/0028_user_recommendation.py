@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 20:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_fooditem_neighbor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='precomputed_recommendations', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('item_ids', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_user_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='consumption_rate',
+            field=models.FloatField(default=0.0, help_text='EWMA of units sold per minute (see core.sellout)'),
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='last_consumed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='fooditem',
+            name='estimated_sellout_time',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Predicted time when item will sell out', null=True),
+        ),
+    ]
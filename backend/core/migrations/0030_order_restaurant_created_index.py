@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_fooditem_consumption_rate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', 'created_at'], name='core_order_restaur_842692_idx'),
+        ),
+    ]
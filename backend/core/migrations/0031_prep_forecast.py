@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 20:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_order_restaurant_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrepForecast',
+            fields=[
+                ('restaurant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='prep_forecast', serialize=False, to='core.restaurant')),
+                ('service_start', models.DateTimeField()),
+                ('hours', models.JSONField(default=list, help_text='Start of every forecast hour')),
+                ('prep_minutes', models.JSONField(default=list, help_text='Expected kitchen prep minutes per hour')),
+                ('items', models.JSONField(default=list, help_text='Top dishes by expected prep minutes')),
+                ('computed_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from allauth.account.forms import SignupForm
 from django import forms
+from .geo import encode_geohash
 
 class User(AbstractUser):
     IS_CUSTOMER = 'customer'
@@ -58,6 +59,7 @@ class Restaurant(models.Model):
     location = models.CharField(max_length=200)
     latitude = models.FloatField(blank=True, null=True)
     longitude = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False, help_text="Derived from latitude/longitude for nearby search")
     rating = models.FloatField(default=0.0)
     is_open = models.BooleanField(default=True)
     image = models.ImageField(upload_to='restaurant_profiles/', blank=True, null=True)
@@ -65,6 +67,18 @@ class Restaurant(models.Model):
     opening_time = models.TimeField(blank=True, null=True)
     closing_time = models.TimeField(blank=True, null=True)
 
+    def save(self, *args, **kwargs):
+        # Keep the geohash in sync with the coordinates (used by NearbyRestaurantsAPIView)
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -83,10 +97,22 @@ class FoodItem(models.Model):
     
     # New fields for real-time tracking and AI
     quantity_available = models.IntegerField(default=100, help_text="Current quantity available")
-    estimated_sellout_time = models.DateTimeField(null=True, blank=True, help_text="Predicted time when item will sell out")
+    estimated_sellout_time = models.DateTimeField(null=True, blank=True, db_index=True, help_text="Predicted time when item will sell out")
+    consumption_rate = models.FloatField(default=0.0, help_text="EWMA of units sold per minute (see core.sellout)")
+    last_consumed_at = models.DateTimeField(null=True, blank=True)
     popularity_score = models.FloatField(default=0.0, help_text="AI-calculated popularity (0-100)")
     preparation_time = models.IntegerField(default=15, help_text="Preparation time in minutes")
 
+    # Exponentially decayed trend score (TREND_SCORE_MODE = 'decayed', see core.trends)
+    decayed_score = models.FloatField(default=0.0, help_text="Decayed trend score as of decayed_at")
+    decayed_at = models.DateTimeField(null=True, blank=True)
+    decayed_rank = models.FloatField(default=-1e15, db_index=True, help_text="Time-independent sort key for the decayed score")
+
+    def current_decayed_score(self, now=None):
+        """Decayed trend score right now (decay is applied lazily on read)."""
+        from .trends import decay
+        return decay(self.decayed_score, self.decayed_at, now)
+
     def __str__(self):
         return f"{self.name} - {self.restaurant.name}"
 
@@ -160,6 +186,11 @@ class Order(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['restaurant', 'created_at']), # Demand forecasting history scans
+        ]
+
 from django.utils import timezone
 
 class FoodAnalytics(models.Model):
@@ -167,6 +198,153 @@ class FoodAnalytics(models.Model):
     interaction_type = models.CharField(max_length=20) # view, click, order
     created_at = models.DateTimeField(default=timezone.now)
 
+class FoodAnalyticsHourly(models.Model):
+    """
+    FoodAnalytics rolled up per item, interaction type and hour (UTC).
+    Raw rows of past hours are folded in by `manage.py compact_analytics`;
+    read counts through core.analytics.interaction_counts(), which adds both.
+    """
+    food_item = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name='hourly_analytics')
+    interaction_type = models.CharField(max_length=20)
+    hour = models.DateTimeField(db_index=True) # Start of the hour
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('food_item', 'interaction_type', 'hour')
+
+    def __str__(self):
+        return f"{self.food_item_id} {self.interaction_type} @ {self.hour}: {self.count}"
+
+class TrendWindow(models.Model):
+    """
+    Single row: start of the trend window already reflected in FoodItem.trend_score.
+    Incremental updates add contributions as events happen; compaction subtracts
+    the ones that fall out of the window (see core.trends).
+    """
+    window_start = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Trend window from {self.window_start}"
+
+class RestaurantTrendStats(models.Model):
+    """
+    Materialized per-restaurant trend aggregates, rewritten on every trend refresh
+    (core.trends.refresh_restaurant_trend_stats). Backs the trending restaurants API.
+    """
+    restaurant = models.OneToOneField(Restaurant, on_delete=models.CASCADE, primary_key=True, related_name='trend_stats')
+    city = models.CharField(max_length=200, db_index=True) # Copy of restaurant.location for filtering
+    item_count = models.PositiveIntegerField(default=0)
+    avg_trend_score = models.FloatField(default=0.0, db_index=True)
+    max_trend_score = models.FloatField(default=0.0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-avg_trend_score', 'restaurant_id']
+
+    def __str__(self):
+        return f"{self.restaurant_id}: avg {self.avg_trend_score:.2f} over {self.item_count} items"
+
+class UserTasteProfile(models.Model):
+    """
+    Compact summary of a customer's recent orders used by RecommendationView.
+    Updated when the customer places an order (see core.recommendations).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='taste_profile')
+    recent_orders = models.JSONField(default=list, help_text="Item ids of the latest orders, newest first")
+    category_counts = models.JSONField(default=dict)
+    cuisine_counts = models.JSONField(default=dict)
+    top_category = models.CharField(max_length=50, blank=True, default='', db_index=True)
+    top_cuisine = models.CharField(max_length=50, blank=True, default='', db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def recent_item_ids(self):
+        return [item_id for order_items in self.recent_orders for item_id in order_items]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.top_category or '-'} / {self.top_cuisine or '-'}"
+
+class UserRecommendation(models.Model):
+    """Ranked recommendation ids precomputed by `manage.py precompute_recommendations`."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='precomputed_recommendations')
+    item_ids = models.JSONField(default=list)
+    computed_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.item_ids}"
+
+class FoodItemNeighbor(models.Model):
+    """
+    Top-K items most often ordered together with food_item (cosine similarity of
+    their order baskets), rebuilt offline by `manage.py build_item_neighbors`.
+    """
+    food_item = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('food_item', 'rank')
+
+    def __str__(self):
+        return f"{self.food_item_id} -> {self.neighbor_id} ({self.score:.3f})"
+
+class PrepForecast(models.Model):
+    """
+    Per-dish hourly forecast of the next service for a restaurant's kitchen,
+    built in batch by `manage.py build_prep_forecasts` (see core.forecasting).
+    """
+    restaurant = models.OneToOneField(Restaurant, on_delete=models.CASCADE, primary_key=True, related_name='prep_forecast')
+    service_start = models.DateTimeField()
+    hours = models.JSONField(default=list, help_text="Start of every forecast hour")
+    prep_minutes = models.JSONField(default=list, help_text="Expected kitchen prep minutes per hour")
+    items = models.JSONField(default=list, help_text="Top dishes by expected prep minutes")
+    computed_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.restaurant_id}: {len(self.items)} dishes from {self.service_start}"
+
+# Background Jobs
+
+class BackgroundJob(models.Model):
+    """Database-backed job queue processed by `manage.py run_jobs` (see core.jobs)."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
+    progress = models.FloatField(default=0.0, help_text="Percent complete (0-100)")
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    # Set to the job kind while queued/running so only one active job per kind can exist
+    dedupe_key = models.CharField(max_length=50, unique=True, null=True, blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
+
+class JobLock(models.Model):
+    """Cross-process lock with expiry, shared by every app node through the database."""
+    name = models.CharField(max_length=100, unique=True)
+    owner = models.CharField(max_length=100)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} held by {self.owner}"
+
 # Social Network Models
 
 class Reel(models.Model):
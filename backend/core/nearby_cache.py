@@ -0,0 +1,103 @@
+"""
+Tile-quantized cache for /api/nearby-restaurants/.
+
+Customer locations are snapped to a small tile (NEARBY_CACHE_TILE_DEG). For each
+(tile, radius) we cache the serialized restaurants within radius + the tile's
+half-diagonal of the tile centre, which is a superset of the answer for any point
+inside the tile. A request then only recomputes distances from its exact location.
+
+Invalidation uses generation counters on coarse regions (REGION_DEG). Every cache
+key embeds a hash of the generations of the regions its circle touches, so bumping
+the region of a changed restaurant invalidates all tiles that could contain it in O(1).
+"""
+import hashlib
+from math import floor, sqrt
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .geo import KM_PER_DEGREE, bounding_box, haversine_km
+from .tracing import Trace
+
+REGION_DEG = 0.5
+
+
+def _tile_deg():
+    return getattr(settings, 'NEARBY_CACHE_TILE_DEG', 0.01)
+
+
+def _region(lat, lng):
+    return int(floor(lat / REGION_DEG)), int(floor(lng / REGION_DEG))
+
+
+def _generation_key(region):
+    return f"nearby:gen:{region[0]}:{region[1]}"
+
+
+def _regions_for_circle(lat, lng, radius_km):
+    lat_min, lat_max, lng_min, lng_max = bounding_box(lat, lng, radius_km)
+    row_min, col_min = _region(lat_min, lng_min)
+    row_max, col_max = _region(lat_max, lng_max)
+    return [
+        (row, col)
+        for row in range(row_min, row_max + 1)
+        for col in range(col_min, col_max + 1)
+    ]
+
+
+def invalidate_location(lat, lng):
+    """Invalidate every cached tile whose results could include a restaurant at (lat, lng)."""
+    if lat is None or lng is None:
+        return
+    key = _generation_key(_region(lat, lng))
+    if cache.add(key, 1, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def _tile_entry(lat, lng, radius_km, compute):
+    tile = _tile_deg()
+    row, col = int(floor(lat / tile)), int(floor(lng / tile))
+    center_lat, center_lng = (row + 0.5) * tile, (col + 0.5) * tile
+    # Half the tile diagonal, measured with latitude degrees (longitude degrees are never longer)
+    search_radius = radius_km + tile * KM_PER_DEGREE * sqrt(2) / 2
+
+    regions = _regions_for_circle(center_lat, center_lng, search_radius)
+    generation_keys = [_generation_key(region) for region in regions]
+    generations = cache.get_many(generation_keys)
+    # Hashed so the key length doesn't grow with the radius (memcached caps keys at 250 chars)
+    version = hashlib.md5(
+        '.'.join(str(generations.get(key, 0)) for key in generation_keys).encode()
+    ).hexdigest()
+
+    key = f"nearby:tile:{row}:{col}:{radius_km:g}:{version}"
+    entry = cache.get(key)
+    if entry is None:
+        entry = compute(center_lat, center_lng, search_radius)
+        cache.set(key, entry, timeout=getattr(settings, 'NEARBY_CACHE_TTL', 60))
+    return entry
+
+
+def cached_nearby(lat, lng, radius_km, compute, trace=None):
+    """
+    Return [(data, distance_km)] for restaurants within radius_km of (lat, lng), nearest first.
+
+    compute(center_lat, center_lng, search_radius) must return a dict with the
+    'lats', 'lngs' and serialized 'data' lists of the restaurants around the tile centre.
+    An optional core.tracing.Trace records the candidate count and distance timing.
+    """
+    trace = trace or Trace('nearby-cache', sample_rate=0)
+    trace.count('cache', 'hit')
+    entry = _tile_entry(lat, lng, radius_km, compute)
+    trace.count('candidates', len(entry['data']))
+    if not entry['data']:
+        return []
+
+    with trace.phase('distance'):
+        distances = haversine_km(lat, lng, entry['lats'], entry['lngs'])
+        matches = [i for i in distances.argsort(kind='stable').tolist() if distances[i] <= radius_km]
+    return [(entry['data'][i], float(distances[i])) for i in matches]
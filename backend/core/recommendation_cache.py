@@ -0,0 +1,121 @@
+"""
+Per-user cache of serialized /api/recommendations/ responses.
+
+Entries live for RECOMMENDATION_CACHE_TTL seconds and are tagged with the user's
+version counter. Invalidating a user bumps the counter, so an entry computed
+concurrently with the invalidation is never served.
+- A user's own order changes their taste profile: invalidate_user().
+- A recommended item going unavailable: every entry records its item ids in a
+  reverse index (item -> users), and invalidate_item() bumps those users.
+  The index is best effort (concurrent fills may drop a user from it); such
+  entries still expire with the TTL.
+
+Misses are single-flight: the first request takes a short cache.add lock and
+computes, concurrent requests for the same user wait for its result.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 10
+WAIT_STEP = 0.05
+
+
+def _ttl():
+    return getattr(settings, 'RECOMMENDATION_CACHE_TTL', 300)
+
+
+def _entry_key(user_id):
+    return f"recs:user:{user_id}"
+
+
+def _version_key(user_id):
+    return f"recs:ver:{user_id}"
+
+
+def _lock_key(user_id):
+    return f"recs:lock:{user_id}"
+
+
+def _item_key(item_id):
+    return f"recs:item:{item_id}"
+
+
+def _bump(user_ids):
+    for user_id in user_ids:
+        key = _version_key(user_id)
+        if cache.add(key, 1, timeout=None):
+            continue
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, 1, timeout=None)
+
+
+def invalidate_user(user_id):
+    _bump([user_id])
+
+
+def invalidate_item(item_id):
+    """Drop the cached recommendations of every user who was recommended this item."""
+    key = _item_key(item_id)
+    user_ids = cache.get(key)
+    if user_ids:
+        _bump(user_ids)
+        cache.delete(key)
+
+
+def _lookup(user_id):
+    values = cache.get_many([_entry_key(user_id), _version_key(user_id)])
+    version = values.get(_version_key(user_id), 0)
+    entry = values.get(_entry_key(user_id))
+    if entry is not None and entry['version'] == version:
+        return entry['data'], version
+    return None, version
+
+
+def _store(user_id, version, item_ids, data):
+    cache.set(_entry_key(user_id), {'version': version, 'data': data}, timeout=_ttl())
+    # Reverse index item -> users, so the entry can be dropped when an item goes unavailable
+    keys = [_item_key(item_id) for item_id in item_ids]
+    indexed = cache.get_many(keys)
+    cache.set_many(
+        {key: sorted(set(indexed.get(key, [])) | {user_id}) for key in keys},
+        timeout=_ttl(),
+    )
+
+
+def cached_recommendations(user, compute, serialize):
+    """
+    Return the serialized recommendations of `user`.
+    compute(user) returns the items, serialize(items) their response data.
+    """
+    data, version = _lookup(user.id)
+    if data is not None:
+        return data
+
+    lock = _lock_key(user.id)
+    owns_lock = cache.add(lock, 1, timeout=LOCK_TIMEOUT)
+    if not owns_lock:
+        # Someone else is computing: wait for their result, then fall back to computing ourselves
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline and cache.get(lock) is not None:
+            time.sleep(WAIT_STEP)
+            data, version = _lookup(user.id)
+            if data is not None:
+                return data
+        data, version = _lookup(user.id)
+        if data is not None:
+            return data
+        owns_lock = cache.add(lock, 1, timeout=LOCK_TIMEOUT)
+
+    try:
+        items = compute(user)
+        data = list(serialize(items))
+        _store(user.id, version, [item.id for item in items], data)
+    finally:
+        if owns_lock:
+            cache.delete(lock)
+    return data
@@ -0,0 +1,402 @@
+"""
+🧠 Personalized Recommendations
+
+Two signals are blended:
+- Content-based filtering on the customer's favourite category and cuisine over
+  their last TASTE_PROFILE_ORDERS orders. The preferences live in UserTasteProfile,
+  which is updated as orders are placed.
+- Item-to-item collaborative filtering: items that are often ordered together
+  with what the customer ordered recently. build_item_neighbors() computes the
+  co-occurrence matrix of all order baskets offline with SciPy sparse matrices and
+  stores each item's top NEIGHBORS_TOP_K neighbours in FoodItemNeighbor, so the
+  lookup is one indexed query reading K rows per recent item.
+
+precompute_recommendations() runs the same logic for every recently active
+customer in one vectorized batch (e.g. nightly) and stores the ranked ids in
+UserRecommendation; recommendations_for() serves those while they are fresh.
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+from itertools import zip_longest
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import FoodItem, FoodItemNeighbor, Order, UserRecommendation, UserTasteProfile
+from .trends import trend_rank_field
+
+TASTE_PROFILE_ORDERS = 10
+RECOMMENDATION_COUNT = 5
+NEIGHBORS_TOP_K = 20
+
+
+def _apply_orders(profile, recent_orders):
+    """Set the profile's recent orders and recompute its histograms (one query)."""
+    profile.recent_orders = recent_orders[:TASTE_PROFILE_ORDERS]
+    details = {
+        item_id: (category, cuisine)
+        for item_id, category, cuisine in FoodItem.objects.filter(id__in=profile.recent_item_ids)
+        .values_list('id', 'category', 'restaurant__cuisine_type')
+    }
+    categories = Counter()
+    cuisines = Counter()
+    for item_id in profile.recent_item_ids:
+        if item_id in details:
+            category, cuisine = details[item_id]
+            categories[category] += 1
+            cuisines[cuisine] += 1
+
+    profile.category_counts = dict(categories)
+    profile.cuisine_counts = dict(cuisines)
+    profile.top_category = categories.most_common(1)[0][0] if categories else ''
+    profile.top_cuisine = cuisines.most_common(1)[0][0] if cuisines else ''
+    return profile
+
+
+def rebuild_taste_profile(user):
+    """Build the profile from the order history (first use, or after data fixes)."""
+    recent = list(
+        Order.objects.filter(customer=user).order_by('-created_at', '-id').values_list('id', flat=True)[:TASTE_PROFILE_ORDERS]
+    )
+    items_by_order = {order_id: [] for order_id in recent}
+    for order_id, item_id in Order.items.through.objects.filter(order_id__in=recent).order_by('fooditem_id').values_list('order_id', 'fooditem_id'):
+        items_by_order[order_id].append(item_id)
+
+    profile = UserTasteProfile(user=user)
+    _apply_orders(profile, [items_by_order[order_id] for order_id in recent])
+    profile.save()
+    return profile
+
+
+def update_taste_profile(order):
+    """Fold a newly created order into its customer's profile (and drop their cached recommendations)."""
+    from .recommendation_cache import invalidate_user
+
+    if order.customer_id is None:
+        return None  # Walk-in / staff orders have no customer to profile
+    transaction.on_commit(lambda: invalidate_user(order.customer_id))
+    UserRecommendation.objects.filter(user_id=order.customer_id).delete()
+    try:
+        profile = UserTasteProfile.objects.get(user_id=order.customer_id)
+    except UserTasteProfile.DoesNotExist:
+        return rebuild_taste_profile(order.customer)
+
+    item_ids = list(order.items.order_by('id').values_list('id', flat=True))
+    _apply_orders(profile, [item_ids] + profile.recent_orders)
+    profile.save()
+    return profile
+
+
+def get_taste_profile(user):
+    try:
+        return user.taste_profile
+    except UserTasteProfile.DoesNotExist:
+        return rebuild_taste_profile(user)
+
+
+def trending_items(count=RECOMMENDATION_COUNT, exclude=()):
+    return list(
+        FoodItem.objects.filter(is_available=True).exclude(id__in=list(exclude)).order_by(f'-{trend_rank_field()}', 'id')[:count]
+    )
+
+
+def neighbor_items(item_ids, count, exclude=()):
+    """Available items most co-ordered with item_ids (summed similarity), best first."""
+    if not item_ids:
+        return []
+    ranked = list(
+        FoodItemNeighbor.objects.filter(food_item_id__in=item_ids, neighbor__is_available=True)
+        .exclude(neighbor_id__in=list(exclude))
+        .values('neighbor_id').annotate(total=Sum('score'))
+        .order_by('-total', 'neighbor_id')
+        .values_list('neighbor_id', flat=True)[:count]
+    )
+    items = FoodItem.objects.in_bulk(ranked)
+    return [items[item_id] for item_id in ranked if item_id in items]
+
+
+def _interleave(*lists, key=lambda item: item.id):
+    """Merge ranked lists round-robin, dropping duplicates."""
+    merged, seen = [], set()
+    for row in zip_longest(*lists):
+        for item in row:
+            if item is not None and key(item) not in seen:
+                seen.add(key(item))
+                merged.append(item)
+    return merged
+
+
+def recommend_for(user, count=RECOMMENDATION_COUNT):
+    """
+    Items similar to the user's taste they have not ordered recently: co-ordered
+    neighbours interleaved with favourite category/cuisine picks, topped up with trending ones.
+    """
+    profile = get_taste_profile(user)
+    # Cold Start: no history, return Trending items
+    if not profile.top_category:
+        return trending_items(count)
+
+    recent = profile.recent_item_ids
+    content_based = list(
+        FoodItem.objects.filter(is_available=True)
+        .filter(Q(category=profile.top_category) | Q(restaurant__cuisine_type=profile.top_cuisine))
+        .exclude(id__in=recent)
+        .order_by('-popularity_score', f'-{trend_rank_field()}', 'id')[:count]
+    )
+    collaborative = neighbor_items(recent, count, exclude=recent)
+
+    recommendations = _interleave(collaborative, content_based)[:count]
+    if len(recommendations) < count:
+        recommendations += trending_items(count - len(recommendations), exclude=[item.id for item in recommendations])
+    return recommendations
+
+
+def recommendations_for(user, count=RECOMMENDATION_COUNT):
+    """Precomputed recommendations if fresh and still orderable, otherwise computed live."""
+    max_age = getattr(settings, 'RECOMMENDATION_PRECOMPUTE_MAX_AGE', 86400)
+    precomputed = UserRecommendation.objects.filter(
+        user=user, computed_at__gte=timezone.now() - timedelta(seconds=max_age)
+    ).values_list('item_ids', flat=True).first()
+    if precomputed:
+        items = FoodItem.objects.filter(is_available=True).in_bulk(precomputed[:count])
+        if len(items) == min(count, len(precomputed)):
+            return [items[item_id] for item_id in precomputed[:count]]
+    return recommend_for(user, count)
+
+
+# --- Nightly batch precompute -------------------------------------------------
+
+def _load_recent_baskets(since):
+    """{customer_id: [item ids of their last TASTE_PROFILE_ORDERS orders, newest first]} for customers active since `since`."""
+    active = Order.objects.filter(customer__isnull=False, created_at__gte=since).values('customer_id')
+    recent_orders = {}
+    for order_id, customer_id in (
+        Order.objects.filter(customer_id__in=active)
+        .order_by('customer_id', '-created_at', '-id').values_list('id', 'customer_id')
+        .iterator(chunk_size=5000)
+    ):
+        orders = recent_orders.setdefault(customer_id, [])
+        if len(orders) < TASTE_PROFILE_ORDERS:
+            orders.append(order_id)
+
+    order_ids = [order_id for orders in recent_orders.values() for order_id in orders]
+    items_by_order = {order_id: [] for order_id in order_ids}
+    for start in range(0, len(order_ids), 5000):
+        for order_id, item_id in (
+            Order.items.through.objects.filter(order_id__in=order_ids[start:start + 5000])
+            .order_by('fooditem_id').values_list('order_id', 'fooditem_id')
+        ):
+            items_by_order[order_id].append(item_id)
+
+    return {
+        customer_id: [item_id for order_id in orders for item_id in items_by_order[order_id]]
+        for customer_id, orders in recent_orders.items()
+    }
+
+
+def precompute_recommendations(days=None, count=RECOMMENDATION_COUNT, batch_size=2000):
+    """
+    Compute recommend_for() for every customer who ordered in the last `days` days
+    and store the ranked ids in UserRecommendation. Orders, items and neighbours are
+    loaded in bulk; content-based candidates are computed once per (category,
+    cuisine) pair with NumPy masks and co-ordered scores for all users at once as a
+    sparse (users x recent items) @ (items x neighbours) product.
+    """
+    from scipy import sparse
+
+    days = days or getattr(settings, 'RECOMMENDATION_BATCH_DAYS', 30)
+    timings = {}
+    started = time.perf_counter()
+
+    # 1. Load
+    baskets = _load_recent_baskets(timezone.now() - timedelta(days=days))
+    user_ids = list(baskets)
+    basket_items = sorted({item_id for items in baskets.values() for item_id in items})
+    details = {
+        item_id: (category, cuisine)
+        for item_id, category, cuisine in FoodItem.objects.filter(id__in=basket_items)
+        .values_list('id', 'category', 'restaurant__cuisine_type').iterator(chunk_size=5000)
+    }
+    available = list(
+        FoodItem.objects.filter(is_available=True)
+        .values_list('id', 'category', 'restaurant__cuisine_type', 'popularity_score', trend_rank_field())
+        .iterator(chunk_size=5000)
+    )
+    neighbor_rows = list(
+        FoodItemNeighbor.objects.filter(food_item_id__in=basket_items, neighbor__is_available=True)
+        .values_list('food_item_id', 'neighbor_id', 'score').iterator(chunk_size=5000)
+    )
+    timings['load'] = time.perf_counter() - started
+
+    # 2. Score
+    phase_started = time.perf_counter()
+    ids = np.array([row[0] for row in available], dtype=np.int64)
+    categories = np.array([row[1] for row in available], dtype=object)
+    cuisines = np.array([row[2] for row in available], dtype=object)
+    popularity = np.array([row[3] for row in available], dtype=float)
+    trend = np.array([row[4] for row in available], dtype=float)  # trend_score, or decayed_rank in decayed mode
+    popularity_order = np.lexsort((ids, -trend, -popularity))
+    by_popularity = ids[popularity_order]
+    by_popularity_categories = categories[popularity_order]
+    by_popularity_cuisines = cuisines[popularity_order]
+    by_trend = ids[np.lexsort((ids, -trend))]
+
+    # Co-ordered scores: users x basket items (binary) @ basket items x available items
+    basket_index = {item_id: i for i, item_id in enumerate(basket_items)}
+    recent_sets = [set(baskets[user_id]) for user_id in user_ids]
+    recent_matrix = sparse.csr_matrix(
+        (
+            np.ones(sum(map(len, recent_sets))),
+            (
+                np.repeat(np.arange(len(user_ids)), [len(items) for items in recent_sets]),
+                [basket_index[item_id] for items in recent_sets for item_id in items],
+            ),
+        ),
+        shape=(len(user_ids), len(basket_items)),
+    )
+    neighbor_columns, neighbor_index = np.unique(
+        np.array([row[1] for row in neighbor_rows], dtype=np.int64), return_inverse=True
+    )
+    neighbor_matrix = sparse.csr_matrix(
+        (
+            np.array([row[2] for row in neighbor_rows], dtype=float),
+            ([basket_index[row[0]] for row in neighbor_rows], neighbor_index),
+        ),
+        shape=(len(basket_items), len(neighbor_columns)),
+    )
+    collaborative_scores = (recent_matrix @ neighbor_matrix).tocsr()
+
+    content_candidates = {}
+    results = {}
+    for row, user_id in enumerate(user_ids):
+        recent = baskets[user_id]
+        recent_set = recent_sets[row]
+        category_counts = Counter(details[item_id][0] for item_id in recent if item_id in details)
+        cuisine_counts = Counter(details[item_id][1] for item_id in recent if item_id in details)
+        if not category_counts:
+            results[user_id] = by_trend[:count].tolist()  # Cold Start
+            continue
+        preference = (category_counts.most_common(1)[0][0], cuisine_counts.most_common(1)[0][0])
+
+        # Matching items in popularity order, one mask per distinct preference
+        if preference not in content_candidates:
+            mask = (by_popularity_categories == preference[0]) | (by_popularity_cuisines == preference[1])
+            content_candidates[preference] = by_popularity[mask]
+        # At most len(recent_set) candidates are excluded, so this prefix always suffices
+        prefix = content_candidates[preference][:count + len(recent_set)].tolist()
+        content_based = [item_id for item_id in prefix if item_id not in recent_set][:count]
+
+        start, end = collaborative_scores.indptr[row], collaborative_scores.indptr[row + 1]
+        columns = neighbor_columns[collaborative_scores.indices[start:end]]
+        scores = collaborative_scores.data[start:end]
+        keep = ~np.isin(columns, list(recent_set))
+        columns, scores = columns[keep], scores[keep]
+        collaborative = columns[np.lexsort((columns, -scores))][:count].tolist()
+
+        ranked = _interleave(collaborative, content_based, key=lambda item_id: item_id)[:count]
+        if len(ranked) < count:
+            chosen = set(ranked)
+            ranked += [item_id for item_id in by_trend[:2 * count].tolist() if item_id not in chosen][:count - len(ranked)]
+        results[user_id] = ranked
+    timings['score'] = time.perf_counter() - phase_started
+
+    # 3. Write
+    phase_started = time.perf_counter()
+    now = timezone.now()
+    rows = [UserRecommendation(user_id=user_id, item_ids=item_ids, computed_at=now) for user_id, item_ids in results.items()]
+    UserRecommendation.objects.bulk_create(
+        rows, batch_size=batch_size, update_conflicts=True, unique_fields=['user'], update_fields=['item_ids', 'computed_at']
+    )
+    timings['write'] = time.perf_counter() - phase_started
+    timings['total'] = time.perf_counter() - started
+
+    report = {
+        'users': len(results),
+        'timings': {phase: round(seconds, 3) for phase, seconds in timings.items()},
+    }
+    print(
+        f"✅ Recommendations Precomputed for {len(results)} users in {timings['total']:.2f}s "
+        f"(load {timings['load']:.2f}s, score {timings['score']:.2f}s, write {timings['write']:.2f}s)"
+    )
+    return report
+
+
+# --- Offline co-occurrence build ----------------------------------------------
+
+def _basket_matrix():
+    """Binary CSR matrix of orders x items, plus the item id of every column."""
+    from scipy import sparse
+
+    rows = list(Order.items.through.objects.values_list('order_id', 'fooditem_id'))
+    order_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    item_ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    _, order_index = np.unique(order_ids, return_inverse=True)
+    columns, item_index = np.unique(item_ids, return_inverse=True)
+
+    baskets = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (order_index, item_index)),
+        shape=(int(order_index.max()) + 1 if len(rows) else 0, len(columns)),
+    )
+    baskets.data[:] = 1.0  # An item repeated within one order counts once
+    return baskets, columns
+
+
+def build_item_neighbors(top_k=NEIGHBORS_TOP_K, block_size=2000, batch_size=5000):
+    """
+    Rebuild FoodItemNeighbor from all order baskets.
+    Co-occurrence counts come from the sparse product X.T @ X (orders x items
+    basket matrix X), computed block_size items at a time to bound memory, then
+    normalised to cosine similarity and cut to the top_k per item.
+    """
+    timings = {}
+    started = time.perf_counter()
+    baskets, columns = _basket_matrix()
+    timings['load'] = time.perf_counter() - started
+
+    phase_started = time.perf_counter()
+    item_orders = baskets.T.tocsr()  # items x orders
+    order_counts = np.asarray(baskets.sum(axis=0)).ravel()  # Orders containing each item
+    neighbors = []
+
+    for start in range(0, len(columns), block_size):
+        block = (item_orders[start:start + block_size] @ baskets).tocsr()  # co-occurrence rows
+        for offset in range(block.shape[0]):
+            row = start + offset
+            cols = block.indices[block.indptr[offset]:block.indptr[offset + 1]]
+            counts = block.data[block.indptr[offset]:block.indptr[offset + 1]]
+            keep = cols != row
+            cols, counts = cols[keep], counts[keep]
+            if not len(cols):
+                continue
+            scores = counts / np.sqrt(order_counts[row] * order_counts[cols])
+            # Best scores first, ties broken by item id
+            order = np.lexsort((columns[cols], -scores))[:top_k]
+            for rank, i in enumerate(order):
+                neighbors.append(FoodItemNeighbor(
+                    food_item_id=int(columns[row]), neighbor_id=int(columns[cols[i]]),
+                    rank=rank, score=round(float(scores[i]), 6),
+                ))
+    timings['score'] = time.perf_counter() - phase_started
+
+    phase_started = time.perf_counter()
+    with transaction.atomic():
+        FoodItemNeighbor.objects.all().delete()
+        FoodItemNeighbor.objects.bulk_create(neighbors, batch_size=batch_size)
+    timings['write'] = time.perf_counter() - phase_started
+    timings['total'] = time.perf_counter() - started
+
+    report = {
+        'orders': baskets.shape[0],
+        'items': len(columns),
+        'neighbors': len(neighbors),
+        'timings': {phase: round(seconds, 3) for phase, seconds in timings.items()},
+    }
+    print(
+        f"✅ Item Neighbours Built: {len(neighbors)} pairs for {len(columns)} items from {baskets.shape[0]} orders "
+        f"in {timings['total']:.2f}s (load {timings['load']:.2f}s, score {timings['score']:.2f}s, write {timings['write']:.2f}s)"
+    )
+    return report
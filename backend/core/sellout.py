@@ -0,0 +1,147 @@
+"""
+🧠 Sell-out prediction from order velocity.
+
+Each sale updates the item's consumption rate, an exponentially weighted moving
+average of units per minute over irregular time steps:
+
+    rate = rate * exp(-dt / tau) + units / tau
+
+where dt is the time since the previous sale and tau is SELLOUT_RATE_TAU_MINUTES.
+Rates of recent minutes dominate, and a quiet spell decays the rate towards zero.
+The sell-out time is projected as now + quantity_available / rate. It is only
+rewritten when it moves by more than SELLOUT_MIN_SHIFT_MINUTES (or 10% of the time
+left), so the estimated_sellout_time index is not churned on every order.
+
+Between sales the stored rate is decayed to the moment it is read (current_rate),
+so an item that stops selling drifts out of the "selling out" list, and projections
+beyond SELLOUT_HORIZON_HOURS are dropped. Saving an item outside of an order (a
+restock, an availability toggle) re-projects it from the new stock, and
+refresh_sellout_estimates() periodically re-projects (or clears) indexed estimates.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def _tau_minutes():
+    return getattr(settings, 'SELLOUT_RATE_TAU_MINUTES', 30)
+
+
+def _horizon():
+    return timedelta(hours=getattr(settings, 'SELLOUT_HORIZON_HOURS', 24))
+
+
+def project_sellout(quantity, rate, now):
+    if quantity <= 0 or rate <= 0:
+        return None
+    minutes = quantity / rate
+    if minutes > _horizon().total_seconds() / 60:
+        return None # Not selling out any time soon
+    return now + timedelta(minutes=minutes)
+
+
+def current_rate(item, now=None):
+    """The item's consumption rate decayed from its last sale to `now`."""
+    if item.last_consumed_at is None or item.consumption_rate <= 0:
+        return item.consumption_rate
+    now = now or timezone.now()
+    elapsed = max((now - item.last_consumed_at).total_seconds() / 60, 0.0)
+    return item.consumption_rate * math.exp(-elapsed / _tau_minutes())
+
+
+def sellout_estimate(item, now=None):
+    """Project the sell-out time from the current stock and the decayed rate."""
+    now = now or timezone.now()
+    if not item.is_available:
+        return None
+    return project_sellout(item.quantity_available, current_rate(item, now), now)
+
+
+def _shifted(old, new, now):
+    if old is None or new is None:
+        return old != new
+    threshold = max(getattr(settings, 'SELLOUT_MIN_SHIFT_MINUTES', 5) * 60, 0.1 * max((old - now).total_seconds(), 0))
+    return abs((new - old).total_seconds()) > threshold
+
+
+def record_consumption(item, units=1, now=None):
+    """
+    Take `units` out of stock and update the item's rate and sell-out estimate in memory.
+    Returns the fields to pass to item.save(update_fields=...).
+    """
+    now = now or timezone.now()
+    tau = _tau_minutes()
+
+    item.quantity_available = max(item.quantity_available - units, 0)
+    fields = ['quantity_available', 'consumption_rate', 'last_consumed_at', 'last_updated']
+
+    # Logic: When stock = 0 -> Automatically hide item
+    if item.quantity_available <= 0:
+        item.is_available = False
+        fields.append('is_available')
+
+    if item.last_consumed_at is not None:
+        elapsed = max((now - item.last_consumed_at).total_seconds() / 60, 0.0)
+        item.consumption_rate = item.consumption_rate * math.exp(-elapsed / tau) + units / tau
+    else:
+        item.consumption_rate = units / tau
+    item.last_consumed_at = now
+
+    estimate = project_sellout(item.quantity_available, item.consumption_rate, now)
+    if _shifted(item.estimated_sellout_time, estimate, now):
+        item.estimated_sellout_time = estimate
+        fields.append('estimated_sellout_time')
+    return fields
+
+
+def refresh_sellout_estimates(now=None, batch_size=1000):
+    """Re-project every indexed estimate with decayed rates; quiet items are cleared. Returns rows changed."""
+    from .models import FoodItem
+
+    now = now or timezone.now()
+    changed = []
+    updated = 0
+    items = FoodItem.objects.filter(estimated_sellout_time__isnull=False).only(
+        'id', 'is_available', 'quantity_available', 'consumption_rate', 'last_consumed_at', 'estimated_sellout_time'
+    )
+    for item in items.iterator(chunk_size=batch_size):
+        estimate = sellout_estimate(item, now)
+        if estimate is None or _shifted(item.estimated_sellout_time, estimate, now):
+            item.estimated_sellout_time = estimate
+            changed.append(item)
+        if len(changed) >= batch_size:
+            FoodItem.objects.bulk_update(changed, ['estimated_sellout_time'])
+            updated += len(changed)
+            changed = []
+    if changed:
+        FoodItem.objects.bulk_update(changed, ['estimated_sellout_time'])
+        updated += len(changed)
+    print(f"✅ Sell-out estimates refreshed: {updated} changed")
+    return updated
+
+
+def selling_out(queryset, limit=10, now=None):
+    """
+    The `limit` items of queryset predicted to sell out soonest, re-projected with
+    their decayed rates. A rate only decays between sales, so stored estimates are
+    (up to the write threshold) lower bounds of the current ones: candidates are read
+    in index order until the next stored estimate is later than the limit-th
+    re-projected one.
+    """
+    now = now or timezone.now()
+    best = []
+    candidates = queryset.filter(
+        is_available=True, estimated_sellout_time__gte=now, estimated_sellout_time__lte=now + _horizon()
+    ).order_by('estimated_sellout_time', 'id')
+    for item in candidates.iterator(chunk_size=limit * 5):
+        if len(best) >= limit and item.estimated_sellout_time > best[-1][0]:
+            break
+        estimate = sellout_estimate(item, now)
+        if estimate is None:
+            continue
+        best.append((estimate, item.id, item))
+        best.sort(key=lambda entry: entry[:2])
+        del best[limit:]
+    return [item for _, _, item in best]
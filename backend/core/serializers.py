@@ -1,7 +1,9 @@
+from django.db.models import Count, Exists, IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
 from .models import (
     FoodItem, Restaurant, Table, Booking, Bill, Order, User, Reel, Comment, Follow,
-    Offer, UserOffer, Notification, RestaurantCrowd
+    Offer, UserOffer, Notification, RestaurantCrowd, BackgroundJob, RestaurantTrendStats
 )
 
 class UserSerializer(serializers.ModelSerializer):
@@ -35,7 +37,11 @@ class RestaurantSerializer(serializers.ModelSerializer):
             attrs.pop('maps_link', None)
         return attrs
 
+    # stats and is_following read the annotations of annotate_restaurant_stats() when
+    # present, and fall back to one query per restaurant otherwise
     def get_stats(self, obj):
+        if hasattr(obj, 'followers_count'):
+            return {'followers': obj.followers_count, 'posts': obj.posts_count}
         return {
             'followers': obj.followers.count(),
             'posts': obj.reels.count()
@@ -44,9 +50,42 @@ class RestaurantSerializer(serializers.ModelSerializer):
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'followed_by_user'):
+                return obj.followed_by_user
             return obj.followers.filter(follower=request.user).exists()
         return False
 
+def _count_for(model):
+    return Coalesce(Subquery(
+        model.objects.filter(restaurant=OuterRef('pk')).order_by()
+        .values('restaurant').annotate(n=Count('id')).values('n'),
+        output_field=IntegerField()
+    ), 0)
+
+def annotate_restaurant_stats(queryset, request=None):
+    """Annotate a Restaurant queryset with everything RestaurantSerializer reads."""
+    user = getattr(request, 'user', None)
+    following = (
+        Exists(Follow.objects.filter(restaurant=OuterRef('pk'), follower=user))
+        if user is not None and user.is_authenticated else Value(False)
+    )
+    return queryset.annotate(
+        followers_count=_count_for(Follow),
+        posts_count=_count_for(Reel),
+        followed_by_user=following,
+    )
+
+def restaurant_stats_prefetch(request=None, lookup='restaurant'):
+    """
+    Prefetch of the (annotated) restaurant of food items, for FoodItemSerializer.
+    Replaces select_related('restaurant'): a relation already loaded is not prefetched again.
+    """
+    return Prefetch(lookup, queryset=annotate_restaurant_stats(Restaurant.objects.select_related('user'), request))
+
+def order_items_prefetch(request=None, lookup='items'):
+    """Prefetch of order items and their annotated restaurants, for OrderSerializer."""
+    return Prefetch(lookup, queryset=FoodItem.objects.prefetch_related(restaurant_stats_prefetch(request)))
+
 class CommentSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
     user_avatar = serializers.SerializerMethodField()
@@ -129,6 +168,13 @@ class FoodItemSerializer(serializers.ModelSerializer):
             'stock_status'
         ]
     
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Present when the queryset was annotated by a geo query
+        if getattr(instance, 'distance_km', None) is not None:
+            data['distance_km'] = round(instance.distance_km, 2)
+        return data
+
     def get_stock_status(self, obj):
         if not obj.is_available or obj.quantity_available <= 0:
             return "Unavailable"
@@ -248,3 +294,27 @@ class RestaurantCrowdSerializer(serializers.ModelSerializer):
         model = RestaurantCrowd
         fields = ['id', 'restaurant', 'restaurant_name', 'timestamp', 'crowd_level', 'active_orders', 'occupied_tables']
         read_only_fields = ['restaurant']
+
+# Background Job Serializer
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BackgroundJob
+        fields = ['id', 'kind', 'status', 'progress', 'message', 'result', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+class RestaurantTrendStatsSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='restaurant_id', read_only=True)
+    name = serializers.CharField(source='restaurant.name', read_only=True)
+    cuisine_type = serializers.CharField(source='restaurant.cuisine_type', read_only=True)
+    rating = serializers.FloatField(source='restaurant.rating', read_only=True)
+    image = serializers.ImageField(source='restaurant.image', read_only=True)
+    image_url = serializers.URLField(source='restaurant.image_url', read_only=True)
+    is_open = serializers.BooleanField(source='restaurant.is_open', read_only=True)
+
+    class Meta:
+        model = RestaurantTrendStats
+        fields = [
+            'id', 'name', 'cuisine_type', 'city', 'rating', 'image', 'image_url', 'is_open',
+            'item_count', 'avg_trend_score', 'max_trend_score', 'refreshed_at',
+        ]
@@ -1,7 +1,14 @@
 from django.dispatch import receiver
+from django.db.models.signals import pre_save, post_save, post_delete
 from allauth.account.signals import user_signed_up
 from django.db import transaction
-from .models import Restaurant
+from .models import FoodItem, Order, Restaurant
+from .locator import locator
+from .nearby_cache import invalidate_location
+from .recommendation_cache import invalidate_item
+from .highlights import mark_highlights_stale
+from .forecasting import record_order
+from .sellout import sellout_estimate
 
 @receiver(user_signed_up)
 def handle_user_signup(request, user, **kwargs):
@@ -49,3 +56,62 @@ def handle_user_signup(request, user, **kwargs):
                 'is_open': True
             }
         )
+
+
+@receiver(pre_save, sender=Restaurant)
+def remember_restaurant_location(sender, instance, **kwargs):
+    # Needed to invalidate the nearby cache tiles around the old position after a move
+    instance._previous_location = None
+    if instance.pk:
+        instance._previous_location = Restaurant.objects.filter(pk=instance.pk).values_list('latitude', 'longitude').first()
+
+@receiver(post_save, sender=Restaurant)
+def update_restaurant_locator(sender, instance, **kwargs):
+    # Keep this worker's nearby-search index in sync (covers is_open flips and moves)
+    transaction.on_commit(
+        lambda: locator.update(instance.pk, instance.latitude, instance.longitude, instance.is_open)
+    )
+
+    # Any change (is_open, coordinates or profile) invalidates the cached nearby tiles around it
+    locations = {(instance.latitude, instance.longitude), getattr(instance, '_previous_location', None) or (None, None)}
+    def invalidate():
+        for lat, lng in locations:
+            invalidate_location(lat, lng)
+    transaction.on_commit(invalidate)
+
+@receiver(post_delete, sender=Restaurant)
+def remove_from_restaurant_locator(sender, instance, **kwargs):
+    restaurant_id = instance.pk
+    lat, lng = instance.latitude, instance.longitude
+    transaction.on_commit(lambda: locator.discard(restaurant_id))
+    transaction.on_commit(lambda: invalidate_location(lat, lng))
+
+
+@receiver(pre_save, sender=FoodItem)
+def reproject_sellout(sender, instance, update_fields=None, **kwargs):
+    # Full saves (menu edits, restocks, availability toggles) re-project from the new stock;
+    # order-driven saves pass update_fields and are projected in record_consumption
+    if update_fields is None:
+        instance.estimated_sellout_time = sellout_estimate(instance)
+
+@receiver(post_save, sender=FoodItem)
+def invalidate_unavailable_recommendations(sender, instance, **kwargs):
+    # Cached recommendations must not keep offering an item that can no longer be ordered
+    if not instance.is_available:
+        item_id = instance.pk
+        transaction.on_commit(lambda: invalidate_item(item_id))
+    # Stock or availability may have changed
+    transaction.on_commit(mark_highlights_stale)
+
+@receiver(post_delete, sender=FoodItem)
+def invalidate_deleted_recommendations(sender, instance, **kwargs):
+    item_id = instance.pk
+    transaction.on_commit(lambda: invalidate_item(item_id))
+    transaction.on_commit(mark_highlights_stale)
+
+@receiver(post_save, sender=Order)
+def update_demand_profile(sender, instance, created, **kwargs):
+    # Keep the cached hour-of-week profile of the restaurant current
+    if created:
+        restaurant_id, created_at = instance.restaurant_id, instance.created_at
+        transaction.on_commit(lambda: record_order(restaurant_id, created_at))
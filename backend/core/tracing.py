@@ -0,0 +1,52 @@
+"""
+Lightweight, sampled tracing for hot request paths (e.g. the nearby search pipeline).
+
+Tracing is off by default. Set GEO_TRACE_SAMPLE_RATE (0.0 - 1.0) to record a
+fraction of requests; sampled requests log one line to the 'core.trace' logger
+with per-phase timings (ms) and counters. Unsampled requests only pay for a
+random() call and a few attribute checks.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger('core.trace')
+
+
+class Trace:
+
+    def __init__(self, name, sample_rate=None):
+        if sample_rate is None:
+            sample_rate = getattr(settings, 'GEO_TRACE_SAMPLE_RATE', 0.0)
+        self.name = name
+        self.enabled = sample_rate > 0 and random.random() < sample_rate
+        self.timings = {}
+        self.counts = {}
+        self._started = time.perf_counter() if self.enabled else None
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block; repeated phases with the same name are summed."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    def count(self, name, value):
+        if self.enabled:
+            self.counts[name] = value
+
+    def finish(self, **extra):
+        if not self.enabled:
+            return
+        total = (time.perf_counter() - self._started) * 1000
+        timings = ' '.join(f"{name}={ms:.2f}ms" for name, ms in self.timings.items())
+        counts = ' '.join(f"{name}={value}" for name, value in {**self.counts, **extra}.items())
+        logger.info(f"{self.name} total={total:.2f}ms {timings} {counts}".strip())
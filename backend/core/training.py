@@ -0,0 +1,162 @@
+"""
+🤖 AI Training: interaction-weighted popularity
+
+Every FoodAnalytics event adds INTERACTION_WEIGHTS[type] to its item; the totals
+are scaled to 0-100 (best item = 100) and stored in FoodItem.popularity_score.
+
+Events are streamed from the database in id-ordered chunks (raw rows and hourly
+rollups), turned into NumPy arrays and summed per item with np.bincount, so
+memory stays bounded by the chunk size plus one float per item id.
+"""
+import random
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from .models import FoodAnalytics, FoodAnalyticsHourly, FoodItem, RestaurantTrendStats
+from .trends import decay_mode_enabled, trend_rank_field
+
+INTERACTION_WEIGHTS = {
+    'view': 0.5,
+    'click': 1.0,
+    'order': 5.0,
+}
+
+
+def generate_mock_analytics(count=500):
+    """Simulate `count` random interactions over the last 24h."""
+    item_ids = list(FoodItem.objects.values_list('id', flat=True))
+    if not item_ids:
+        print("No food items found. Please run populate_db.py first.")
+        return 0
+
+    interaction_types = ['view', 'click', 'order']
+    now = timezone.now()
+    events = [
+        FoodAnalytics(
+            food_item_id=random.choice(item_ids),
+            interaction_type=random.choices(interaction_types, weights=[70, 20, 10], k=1)[0], # Orders are rarer
+            created_at=now - timedelta(minutes=random.randint(1, 1440)), # Last 24h
+        )
+        for _ in range(count)
+    ]
+    FoodAnalytics.objects.bulk_create(events, batch_size=1000)
+    print(f"✅ Generated {count} interaction records.")
+    return count
+
+
+def _weight_lookup(interaction_types):
+    return np.array([INTERACTION_WEIGHTS.get(kind, 0.0) for kind in interaction_types], dtype=float)
+
+
+def _stream(queryset, fields, chunk_size):
+    """Yield lists of rows (id first) from queryset in id order, chunk_size rows at a time."""
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', *fields)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _accumulate(totals, item_ids, weights):
+    """Add per-event weights into the totals array (indexed by item id), growing it as needed."""
+    sums = np.bincount(item_ids, weights=weights)
+    if len(sums) > len(totals):
+        totals = np.concatenate([totals, np.zeros(len(sums) - len(totals))])
+    totals[:len(sums)] += sums
+    return totals
+
+
+def train_popularity_scores(chunk_size=100000, batch_size=2000):
+    """
+    Recompute FoodItem.popularity_score from all interaction events.
+    Returns a report with row counts, timings and rows/second.
+    """
+    started = time.perf_counter()
+    totals = np.zeros(0)
+    events = 0
+    rows_read = 0
+
+    sources = [
+        (FoodAnalytics.objects.filter(interaction_type__in=INTERACTION_WEIGHTS), None),
+        (FoodAnalyticsHourly.objects.filter(interaction_type__in=INTERACTION_WEIGHTS), 'count'),
+    ]
+    for queryset, count_field in sources:
+        fields = ['food_item_id', 'interaction_type'] + ([count_field] if count_field else [])
+        for rows in _stream(queryset, fields, chunk_size):
+            item_ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+            kinds, codes = np.unique([row[2] for row in rows], return_inverse=True)
+            weights = _weight_lookup(kinds)[codes]
+            if count_field:
+                counts = np.fromiter((row[3] for row in rows), dtype=float, count=len(rows))
+                weights = weights * counts
+                events += int(counts.sum())
+            else:
+                events += len(rows)
+            totals = _accumulate(totals, item_ids, weights)
+            rows_read += len(rows)
+    read_seconds = time.perf_counter() - started
+
+    if not len(totals) or totals.max() <= 0:
+        print("No interactions found. Run with --generate to create mock analytics.")
+        return {'rows_read': rows_read, 'events': events, 'items_updated': 0}
+
+    # Scale to 0-100 relative to the most popular item
+    scores = np.round(totals * (100.0 / totals.max()), 1)
+
+    write_started = time.perf_counter()
+    updated = 0
+    batch = []
+    for item_id, old_score in FoodItem.objects.values_list('id', 'popularity_score').iterator(chunk_size=batch_size):
+        score = float(scores[item_id]) if item_id < len(scores) else 0.0
+        if score != old_score:
+            batch.append(FoodItem(id=item_id, popularity_score=score))
+        if len(batch) >= batch_size:
+            FoodItem.objects.bulk_update(batch, ['popularity_score'])
+            updated += len(batch)
+            batch = []
+    if batch:
+        FoodItem.objects.bulk_update(batch, ['popularity_score'])
+        updated += len(batch)
+    write_seconds = time.perf_counter() - write_started
+    total = time.perf_counter() - started
+
+    report = {
+        'rows_read': rows_read,
+        'events': events,
+        'items_updated': updated,
+        'read_seconds': round(read_seconds, 3),
+        'write_seconds': round(write_seconds, 3),
+        'rows_per_second': round(rows_read / read_seconds) if read_seconds else rows_read,
+    }
+    print(
+        f"✅ Training Complete. {events} interactions ({rows_read} rows) read in {read_seconds:.2f}s "
+        f"({report['rows_per_second']} rows/s); popularity updated for {updated} items in {write_seconds:.2f}s "
+        f"(total {total:.2f}s)\n"
+    )
+    return report
+
+
+def show_results():
+    print("📊 TOP 5 TRENDING FOODS:")
+    print("-" * 30)
+    top_foods = FoodItem.objects.select_related('restaurant').order_by(f'-{trend_rank_field()}')[:5]
+    for i, food in enumerate(top_foods, 1):
+        score = round(food.current_decayed_score(), 2) if decay_mode_enabled() else food.trend_score
+        print(f"{i}. {food.name} ({food.restaurant.name}) - Score: {score}")
+
+    print("\n🔥 TOP 5 POPULAR FOODS:")
+    print("-" * 30)
+    popular = FoodItem.objects.select_related('restaurant').order_by('-popularity_score')[:5]
+    for i, food in enumerate(popular, 1):
+        print(f"{i}. {food.name} ({food.restaurant.name}) - Popularity: {food.popularity_score}")
+
+    print("\n🏆 TOP TRENDING RESTAURANTS (Avg Food Score):")
+    print("-" * 30)
+    leaderboard = RestaurantTrendStats.objects.select_related('restaurant')[:3]
+    for i, stats in enumerate(leaderboard, 1):
+        print(f"{i}. {stats.restaurant.name} - Avg Score: {stats.avg_trend_score}")
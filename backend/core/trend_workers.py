@@ -0,0 +1,31 @@
+"""
+⚙️ Process-pool workers for recompute_trend_scores_parallel.
+
+Kept free of model imports at module level: under the 'spawn' start method
+(the default on Windows and macOS) each child imports this module to unpickle
+the task function, before Django is configured. init_worker() runs
+django.setup() first and only then are core.* modules imported.
+"""
+import os
+import time
+
+
+def init_worker(settings_module):
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+    from django.db import connections
+
+    # Never reuse a connection inherited from the parent; each worker opens its own
+    connections.close_all()
+
+
+def recompute_partition(args):
+    from .utils import update_trend_scores
+
+    since, restaurant_range, batch_size = args
+    started = time.perf_counter()
+    scanned, updated = update_trend_scores(since, restaurant_range, batch_size=batch_size)
+    return os.getpid(), scanned, updated, time.perf_counter() - started
@@ -0,0 +1,404 @@
+"""
+🧠 Incremental Trend Scores
+
+FoodItem.trend_score = (orders * 0.5) + (searches * 0.3) + (reel engagement * 0.2),
+with orders and searches counted over the last 7 days.
+
+Instead of rescanning every item, interactions push weighted deltas as they
+happen (record_trend_event) and compact_trend_scores() subtracts the
+contributions of events that have aged out of the window since the last run.
+A refresh therefore only touches the items that actually changed.
+A full recalculation (utils.calculate_trend_scores) re-bases all scores.
+
+With TREND_SCORE_MODE = 'decayed' the hard 7-day cutoff is replaced by
+exponential decay: each item keeps (decayed_score, decayed_at) and every new
+event first decays the old score to "now" (half-life TREND_HALF_LIFE_HOURS).
+No periodic scan is needed. Items are ranked by decayed_rank, a time-independent
+key (log2(score) + age of the last update in half-lives) that orders items
+exactly like their decayed scores at any common instant.
+"""
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max
+from django.utils import timezone
+
+from .analytics import interaction_counts
+from .models import (
+    Comment, FoodAnalytics, FoodAnalyticsHourly, FoodItem, Order, ReelLike, RestaurantTrendStats, TrendWindow
+)
+from .utils import SEARCH_INTERACTIONS, TREND_WEIGHTS, trend_window_start
+
+DECAY_EPOCH = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+DECAY_RANK_FLOOR = -1e15  # Rank of items with no (positive) decayed score
+# Event kinds counted over the 7-day window (reel engagement is all-time)
+WINDOWED_KINDS = ('order', 'search')
+
+
+def decay_mode_enabled():
+    return getattr(settings, 'TREND_SCORE_MODE', 'window') == 'decayed'
+
+
+def trend_rank_field():
+    """FoodItem field that ranks items by trend in the current mode (sort descending)."""
+    return 'decayed_rank' if decay_mode_enabled() else 'trend_score'
+
+
+def _half_life_seconds():
+    return getattr(settings, 'TREND_HALF_LIFE_HOURS', 72) * 3600.0
+
+
+def decay(score, since, now=None):
+    """Decay a score recorded at `since` forward to `now`."""
+    if since is None or not score:
+        return score
+    now = now or timezone.now()
+    return score * 0.5 ** ((now - since).total_seconds() / _half_life_seconds())
+
+
+def decay_rank(score, at):
+    """Sort key such that rank order == decayed score order at any common point in time."""
+    if score <= 0 or at is None:
+        return DECAY_RANK_FLOOR
+    return math.log2(score) + (at - DECAY_EPOCH).total_seconds() / _half_life_seconds()
+
+
+def _apply_deltas(deltas):
+    """Apply {food_item_id: delta} with one UPDATE per distinct delta value."""
+    by_delta = defaultdict(list)
+    for item_id, delta in deltas.items():
+        delta = round(delta, 2)
+        if delta:
+            by_delta[delta].append(item_id)
+
+    for delta, item_ids in by_delta.items():
+        FoodItem.objects.filter(pk__in=item_ids).update(trend_score=F('trend_score') + delta)
+    return sum(len(item_ids) for item_ids in by_delta.values())
+
+
+def _apply_decayed_deltas(deltas):
+    """Decay each item's (score, at) pair to now, then add its delta (read-modify-write)."""
+    now = timezone.now()
+    with transaction.atomic():
+        items = list(
+            FoodItem.objects.select_for_update()
+            .filter(pk__in=list(deltas))
+            .only('id', 'decayed_score', 'decayed_at')
+        )
+        for item in items:
+            item.decayed_score = max(decay(item.decayed_score, item.decayed_at, now) + deltas[item.id], 0.0)
+            item.decayed_at = now
+            item.decayed_rank = decay_rank(item.decayed_score, now)
+        FoodItem.objects.bulk_update(items, ['decayed_score', 'decayed_at', 'decayed_rank'])
+    return len(items)
+
+
+def _push(deltas):
+    deltas = {item_id: delta for item_id, delta in deltas.items() if item_id is not None and delta}
+    if not deltas:
+        return 0
+    if decay_mode_enabled():
+        return _apply_decayed_deltas(deltas)
+    return _apply_deltas(deltas)
+
+
+def _in_window(moment):
+    """Whether an order/search at `moment` is still reflected in trend_score (window mode)."""
+    window_start = TrendWindow.objects.filter(pk=1).values_list('window_start', flat=True).first()
+    return window_start is None or moment >= window_start
+
+
+def record_trend_event(kind, item_ids, sign=1, occurred_at=None):
+    """
+    Push the trend contribution of new interactions.
+
+    kind: 'order', 'search' or 'reel' (see utils.TREND_WEIGHTS)
+    item_ids: one entry per interaction (repeats add up)
+    sign: -1 to retract an interaction (e.g. a reel unlike or a deleted order)
+    occurred_at: when the interactions happened, if not now. In decayed mode the
+        weight is decayed from then; in window mode orders/searches that already
+        aged out of the window are skipped (compaction has subtracted them).
+    """
+    weight = TREND_WEIGHTS[kind] * sign
+    if occurred_at is not None:
+        if decay_mode_enabled():
+            weight = decay(weight, occurred_at)
+        elif kind in WINDOWED_KINDS and not _in_window(occurred_at):
+            return 0
+    counts = Counter(item_id for item_id in item_ids if item_id is not None)
+    return _push({item_id: n * weight for item_id, n in counts.items()})
+
+
+def move_reel_engagement(reel_id, from_item_id, to_item_id):
+    """
+    Move the likes and comments of a reel from one item's trend score to another's,
+    when the reel is relinked (or deleted: to_item_id=None).
+    """
+    if from_item_id == to_item_id:
+        return 0
+    moments = list(ReelLike.objects.filter(reel_id=reel_id).values_list('created_at', flat=True))
+    moments += list(Comment.objects.filter(reel_id=reel_id).values_list('created_at', flat=True))
+    if decay_mode_enabled():
+        now = timezone.now()
+        amount = sum(decay(TREND_WEIGHTS['reel'], moment, now) for moment in moments)
+    else:
+        amount = TREND_WEIGHTS['reel'] * len(moments)
+    return _push({from_item_id: -amount, to_item_id: amount})
+
+
+def _aged_out(window_start, new_start):
+    """Per-item contributions of orders/searches created in [window_start, new_start)."""
+    deltas = defaultdict(float)
+
+    OrderItem = Order.items.through
+    orders = (
+        OrderItem.objects.filter(order__created_at__gte=window_start, order__created_at__lt=new_start)
+        .values('fooditem_id').annotate(n=Count('order_id', distinct=True))
+        .values_list('fooditem_id', 'n')
+    )
+    for item_id, n in orders:
+        deltas[item_id] -= n * TREND_WEIGHTS['order']
+
+    searches = interaction_counts(SEARCH_INTERACTIONS, since=window_start, until=new_start)
+    for item_id, n in searches.items():
+        deltas[item_id] -= n * TREND_WEIGHTS['search']
+
+    return deltas
+
+
+def compact_trend_scores(progress=None):
+    """
+    Slide the trend window forward to now - 7 days (floored to the hour), subtracting what aged out.
+    Cost is proportional to the number of expired events, not the catalogue size.
+    The first run (no window recorded yet) falls back to a full recalculation,
+    which reports progress(percent, message) per batch when given.
+    """
+    from .utils import calculate_trend_scores
+
+    if decay_mode_enabled():
+        refresh_restaurant_trend_stats()
+        return {'mode': 'decayed', 'items_updated': 0}  # Nothing ages out in bulk
+
+    new_start = trend_window_start()
+
+    with transaction.atomic():
+        window, _ = TrendWindow.objects.get_or_create(pk=1)
+        # Lock the row so two compactions never subtract the same events twice
+        window = TrendWindow.objects.select_for_update().get(pk=window.pk)
+
+        full = window.window_start is None
+        if full or new_start <= window.window_start:
+            updated = 0
+        else:
+            updated = _apply_deltas(_aged_out(window.window_start, new_start))
+            window.window_start = new_start
+            window.save()
+
+    if full:
+        # Outside the transaction, so progress heartbeats are visible to other workers
+        # (a full recalculation is idempotent and resets the window itself)
+        return {'mode': 'full', **calculate_trend_scores(progress=progress)}
+
+    refresh_restaurant_trend_stats()
+    print(f"✅ AI Trend Scores Compacted: {updated} items changed")
+    return {'mode': 'incremental', 'items_updated': updated}
+
+
+def _event_arrays(queryset, item_field, time_field, count_field=None):
+    fields = [item_field, time_field] + ([count_field] if count_field else [])
+    rows = list(queryset.values_list(*fields))
+    item_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    timestamps = np.fromiter((row[1].timestamp() for row in rows), dtype=float, count=len(rows))
+    counts = np.fromiter((row[2] if count_field else 1 for row in rows), dtype=float, count=len(rows))
+    return item_ids, timestamps, counts
+
+
+def rebuild_decayed_scores(batch_size=2000):
+    """
+    Recompute every item's decayed score from the raw interaction history.
+    Needed once when switching to TREND_SCORE_MODE = 'decayed' or after changing the half-life.
+    """
+    now = timezone.now()
+    half_life = _half_life_seconds()
+    sources = [
+        (Order.items.through.objects.all(), 'fooditem_id', 'order__created_at', None, TREND_WEIGHTS['order']),
+        (FoodAnalytics.objects.filter(interaction_type__in=SEARCH_INTERACTIONS), 'food_item_id', 'created_at', None, TREND_WEIGHTS['search']),
+        # Rolled-up analytics decay from the start of their hour
+        (FoodAnalyticsHourly.objects.filter(interaction_type__in=SEARCH_INTERACTIONS), 'food_item_id', 'hour', 'count', TREND_WEIGHTS['search']),
+        (ReelLike.objects.filter(reel__food_item__isnull=False), 'reel__food_item_id', 'created_at', None, TREND_WEIGHTS['reel']),
+        (Comment.objects.filter(reel__food_item__isnull=False), 'reel__food_item_id', 'created_at', None, TREND_WEIGHTS['reel']),
+    ]
+
+    scores = defaultdict(float)
+    for queryset, item_field, time_field, count_field, weight in sources:
+        item_ids, timestamps, counts = _event_arrays(queryset, item_field, time_field, count_field)
+        if not len(item_ids):
+            continue
+        # Sum of weight * count * 0.5^(age / half-life) per item, in one vectorized pass
+        weights = weight * counts * np.power(0.5, (now.timestamp() - timestamps) / half_life)
+        unique_ids, inverse = np.unique(item_ids, return_inverse=True)
+        for item_id, score in zip(unique_ids.tolist(), np.bincount(inverse, weights=weights).tolist()):
+            scores[item_id] += score
+
+    batch = []
+    updated = 0
+    for item_id in FoodItem.objects.values_list('id', flat=True).iterator(chunk_size=batch_size):
+        score = scores.get(item_id, 0.0)
+        batch.append(FoodItem(id=item_id, decayed_score=score, decayed_at=now, decayed_rank=decay_rank(score, now)))
+        if len(batch) >= batch_size:
+            FoodItem.objects.bulk_update(batch, ['decayed_score', 'decayed_at', 'decayed_rank'])
+            updated += len(batch)
+            batch = []
+    if batch:
+        FoodItem.objects.bulk_update(batch, ['decayed_score', 'decayed_at', 'decayed_rank'])
+        updated += len(batch)
+
+    refresh_restaurant_trend_stats()
+    print(f"✅ Decayed Trend Scores Rebuilt for {updated} items")
+    return updated
+
+
+def _restaurant_aggregates():
+    """Yield (restaurant_id, location, item_count, avg_score, max_score) for every restaurant with items."""
+    if not decay_mode_enabled():
+        yield from (
+            FoodItem.objects.values('restaurant_id', 'restaurant__location')
+            .annotate(n=Count('id'), avg=Avg('trend_score'), top=Max('trend_score'))
+            .values_list('restaurant_id', 'restaurant__location', 'n', 'avg', 'top')
+            .order_by()
+        )
+        return
+
+    # Decayed scores only mean something once decayed to a common instant, so aggregate in NumPy
+    now = timezone.now()
+    rows = list(FoodItem.objects.values_list('restaurant_id', 'decayed_score', 'decayed_at'))
+    if not rows:
+        return
+    restaurant_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    scores = np.fromiter((decay(row[1], row[2], now) for row in rows), dtype=float, count=len(rows))
+    unique_ids, inverse = np.unique(restaurant_ids, return_inverse=True)
+    counts = np.bincount(inverse)
+    sums = np.bincount(inverse, weights=scores)
+    tops = np.full(len(unique_ids), -np.inf)
+    np.maximum.at(tops, inverse, scores)
+    locations = dict(
+        FoodItem.objects.values_list('restaurant_id', 'restaurant__location').distinct().order_by()
+    )
+    for i, restaurant_id in enumerate(unique_ids.tolist()):
+        yield restaurant_id, locations.get(restaurant_id, ''), int(counts[i]), sums[i] / counts[i], float(tops[i])
+
+
+def refresh_restaurant_trend_stats(batch_size=2000):
+    """
+    Rewrite the RestaurantTrendStats table from the current item scores (one grouped query).
+    Runs after every trend recomputation, so it also flags the smart highlights snapshot for a refresh.
+    """
+    from .highlights import mark_highlights_stale
+
+    mark_highlights_stale()
+    now = timezone.now()
+    fields = ['city', 'item_count', 'avg_trend_score', 'max_trend_score', 'refreshed_at']
+    batch = []
+    written = 0
+
+    def write(batch):
+        RestaurantTrendStats.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=['restaurant'], update_fields=fields
+        )
+
+    for restaurant_id, location, count, avg, top in _restaurant_aggregates():
+        batch.append(RestaurantTrendStats(
+            restaurant_id=restaurant_id, city=location or '', item_count=count,
+            avg_trend_score=round(avg or 0.0, 2), max_trend_score=round(top or 0.0, 2), refreshed_at=now,
+        ))
+        if len(batch) >= batch_size:
+            write(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        write(batch)
+        written += len(batch)
+
+    # Restaurants whose menu became empty
+    RestaurantTrendStats.objects.filter(refreshed_at__lt=now).delete()
+    return written
+
+
+def restaurant_partitions(chunk_size):
+    """Split restaurants that have menu items into [(first_id, end_id)] ranges of chunk_size restaurants."""
+    restaurant_ids = list(
+        FoodItem.objects.order_by('restaurant_id').values_list('restaurant_id', flat=True).distinct()
+    )
+    return [
+        (restaurant_ids[i], restaurant_ids[min(i + chunk_size, len(restaurant_ids)) - 1] + 1)
+        for i in range(0, len(restaurant_ids), chunk_size)
+    ]
+
+
+def recompute_trend_scores_parallel(workers=None, chunk_size=500, batch_size=2000):
+    """
+    Full trend recalculation split by restaurant-id ranges across a process pool.
+    Each worker aggregates and bulk-writes only its own restaurants' items, so the
+    work scales with cores instead of one process scanning the whole catalogue.
+    Returns a report with overall and per-worker throughput.
+    """
+    import multiprocessing
+    import os
+    import time
+    from django.db import connections
+
+    from .trend_workers import init_worker, recompute_partition
+
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    since = trend_window_start()
+    tasks = [(since, partition, batch_size) for partition in restaurant_partitions(chunk_size)]
+
+    per_worker = defaultdict(lambda: {'partitions': 0, 'items_scanned': 0, 'items_updated': 0, 'seconds': 0.0})
+
+    def collect(results):
+        for pid, scanned, updated, seconds in results:
+            stats = per_worker[pid]
+            stats['partitions'] += 1
+            stats['items_scanned'] += scanned
+            stats['items_updated'] += updated
+            stats['seconds'] += seconds
+
+    if workers == 1:
+        collect(map(recompute_partition, tasks))
+    else:
+        # Close our connection before starting workers so none inherits it (fork);
+        # spawned workers configure Django themselves in init_worker
+        connections.close_all()
+        settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'deliciae_core.settings')
+        with multiprocessing.Pool(
+            processes=workers, initializer=init_worker, initargs=(settings_module,)
+        ) as pool:
+            collect(pool.imap_unordered(recompute_partition, tasks))
+
+    TrendWindow.objects.update_or_create(pk=1, defaults={'window_start': since})
+    refresh_restaurant_trend_stats()
+    total = time.perf_counter() - started
+
+    for stats in per_worker.values():
+        stats['items_per_second'] = round(stats['items_scanned'] / stats['seconds']) if stats['seconds'] else 0
+        stats['seconds'] = round(stats['seconds'], 3)
+    scanned = sum(stats['items_scanned'] for stats in per_worker.values())
+    report = {
+        'workers': workers,
+        'partitions': len(tasks),
+        'items_scanned': scanned,
+        'items_updated': sum(stats['items_updated'] for stats in per_worker.values()),
+        'seconds': round(total, 3),
+        'items_per_second': round(scanned / total) if total else scanned,
+        'per_worker': dict(per_worker),
+    }
+    print(
+        f"✅ AI Trend Scores Recalculated in parallel: {report['items_updated']}/{scanned} items changed "
+        f"in {total:.2f}s over {len(tasks)} partitions ({report['items_per_second']} items/s)"
+    )
+    return report
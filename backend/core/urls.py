@@ -9,7 +9,7 @@ from core.views import (
     ReelViewSet, FollowViewSet,
     OfferViewSet, NotificationViewSet, RestaurantCrowdViewSet, update_crowd_status,
     NearbyRestaurantsAPIView, RestaurantProfileUpdateView, UserUpdateAPIView,
-    RefreshTrendView, DemandPredictionView
+    RefreshTrendView, DemandPredictionView, PrepForecastView, BackgroundJobViewSet, TrendingRestaurantsView
 )
 from .ai_views import RecommendationView, SmartHighlightsView, SellingOutView
 
@@ -26,6 +26,7 @@ router.register(r'offers', OfferViewSet, basename='offer')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 router.register(r'crowd', RestaurantCrowdViewSet, basename='crowd')
 router.register(r'restaurants', RestaurantViewSet, basename='restaurant')
+router.register(r'jobs', BackgroundJobViewSet, basename='job')
 
 
 urlpatterns = [
@@ -43,5 +44,7 @@ urlpatterns = [
     path('restaurant/profile/', RestaurantProfileUpdateView.as_view(), name='restaurant-profile-update'),
     path('user/update/', UserUpdateAPIView.as_view(), name='user-update'),
     path('trends/refresh/', RefreshTrendView.as_view(), name='refresh-trends'),
+    path('trends/restaurants/', TrendingRestaurantsView.as_view(), name='trending-restaurants'),
     path('predict/demand/', DemandPredictionView.as_view(), name='predict-demand'),
+    path('predict/prep/', PrepForecastView.as_view(), name='predict-prep'),
 ]
@@ -52,80 +52,213 @@ def extract_lat_long_from_url(url):
         print(f"Error extracting coordinates: {e}")
         return None, None
 
-def calculate_trend_scores():
+TREND_WEIGHTS = {'order': 0.5, 'search': 0.3, 'reel': 0.2}
+TREND_WINDOW_DAYS = 7
+SEARCH_INTERACTIONS = ['search', 'view', 'click']
+
+def trend_window_start(now=None):
+    """
+    Start of the trend window, floored to the hour so that it lines up with the
+    FoodAnalytics hourly rollups (see core.analytics).
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    from .analytics import floor_hour
+
+    return floor_hour((now or timezone.now()) - timedelta(days=TREND_WINDOW_DAYS))
+
+def trend_components(since, restaurant_range=None):
+    """
+    Per-item inputs of the trend formula, each as {food_item_id: count}.
+    One grouped aggregate query per component instead of queries per item.
+    restaurant_range=(first_id, end_id) limits every component to items of
+    restaurants with first_id <= restaurant_id < end_id (used by parallel recomputes).
+    """
+    from django.db.models import Count
+    from .analytics import interaction_counts
+    from .models import Order, ReelLike, Comment
+
+    def scope(item_path):
+        if restaurant_range is None:
+            return {}
+        first_id, end_id = restaurant_range
+        return {
+            f'{item_path}__restaurant_id__gte': first_id,
+            f'{item_path}__restaurant_id__lt': end_id,
+        }
+
+    def scoped(queryset, item_path):
+        return queryset.filter(**scope(item_path))
+
+    # 1. Orders containing the item (an order counts once even if the M2M row repeats)
+    OrderItem = Order.items.through
+    orders = dict(
+        scoped(OrderItem.objects.filter(order__created_at__gte=since), 'fooditem')
+        .values('fooditem_id').annotate(n=Count('order_id', distinct=True))
+        .values_list('fooditem_id', 'n')
+    )
+
+    # 2. Search/View/Click interactions (hourly rollups + raw events)
+    searches = interaction_counts(SEARCH_INTERACTIONS, since=since, **scope('food_item'))
+
+    # 3. Reel engagement: likes + comments on reels featuring the item
+    reels = {}
+    for model in (ReelLike, Comment):
+        rows = (
+            scoped(model.objects.filter(reel__food_item__isnull=False), 'reel__food_item')
+            .values('reel__food_item_id').annotate(n=Count('id'))
+            .values_list('reel__food_item_id', 'n')
+        )
+        for item_id, n in rows:
+            reels[item_id] = reels.get(item_id, 0) + n
+
+    return orders, searches, reels
+
+def trend_score(order_count, search_count, reel_engagement):
+    # 🧠 Final Formula
+    raw_score = (order_count * TREND_WEIGHTS['order']) + (search_count * TREND_WEIGHTS['search']) + (reel_engagement * TREND_WEIGHTS['reel'])
+    # Raw score is fine for relative sorting
+    return round(raw_score, 2)
+
+def update_trend_scores(since, restaurant_range=None, batch_size=2000, timings=None, progress=None):
+    """
+    Recompute trend_score for available items (optionally of one restaurant-id range)
+    and bulk-write the changed ones. Returns (items_scanned, items_updated).
+    progress(percent, message), when given, is called after every batch.
+    """
+    import time
+    from .models import FoodItem
+
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    orders, searches, reels = trend_components(since, restaurant_range)
+    timings['aggregate'] = time.perf_counter() - started
+
+    phase_started = time.perf_counter()
+    items = FoodItem.objects.filter(is_available=True)
+    if restaurant_range is not None:
+        items = items.filter(restaurant_id__gte=restaurant_range[0], restaurant_id__lt=restaurant_range[1])
+    total = items.count() if progress else 0
+    scanned = 0
+    updated = 0
+    batch = []
+
+    for item_id, old_score in items.values_list('id', 'trend_score').iterator(chunk_size=batch_size):
+        scanned += 1
+        score = trend_score(orders.get(item_id, 0), searches.get(item_id, 0), reels.get(item_id, 0))
+        if score != old_score:
+            batch.append(FoodItem(id=item_id, trend_score=score))
+        if len(batch) >= batch_size:
+            FoodItem.objects.bulk_update(batch, ['trend_score'])
+            updated += len(batch)
+            batch = []
+        if progress and scanned % batch_size == 0:
+            progress(100.0 * scanned / max(total, 1), f"Scored {scanned}/{total} items")
+
+    if batch:
+        FoodItem.objects.bulk_update(batch, ['trend_score'])
+        updated += len(batch)
+    timings['update'] = time.perf_counter() - phase_started
+    return scanned, updated
+
+def calculate_trend_scores(batch_size=2000, progress=None):
     """
     🧠 AI Trend Score Calculation Logic
     Formula: (Order * 0.5) + (Search * 0.3) + (Reel Engagement * 0.2)
-    Considers data from the last 7 days.
+    Orders and searches are counted over the last 7 days, reel engagement over all time.
+
+    Runs a handful of grouped aggregate queries, joins them in memory and writes
+    only the changed scores with chunked bulk_update. Returns a timing report.
+    Also resets the window used by incremental updates and refreshes the
+    per-restaurant leaderboard (see core.trends).
+    For very large catalogues use `manage.py recompute_trends --workers N`.
+    progress(percent, message) is reported per batch (background jobs use it as a heartbeat).
     """
-    from django.utils import timezone
-    from datetime import timedelta
-    from django.db.models import Count, Sum
-    from .models import FoodItem, Order, FoodAnalytics, Reel
-    
+    import time
+    from .models import TrendWindow
+    from .trends import refresh_restaurant_trend_stats
+
+    timings = {}
+    started = time.perf_counter()
+
     # Time window: Last 7 days
-    last_7_days = timezone.now() - timedelta(days=7)
-    
-    items = FoodItem.objects.filter(is_available=True)
-    
-    for item in items:
-        # 1. Order Count (Weight: 0.5)
-        # Note: distinct() ensures we don't double count if item is in M2M multiple times (though standard M2M is unique set)
-        # Ideally we'd sum quantity but our model currently lacks easy quantity tracking per item instance order.
-        # Using count of orders containing the item is a proxy for popularity.
-        order_count = Order.objects.filter(items=item, created_at__gte=last_7_days).count()
-        
-        # 2. Search/View Count (Weight: 0.3)
-        search_count = FoodAnalytics.objects.filter(
-            food_item=item, 
-            interaction_type__in=['search', 'view', 'click'], 
-            # created_at logic should be added to Analytics model if not present, assuming it tracks history? 
-            # Model definition didn't show created_at in FoodAnalytics! 
-            # Checking model... it only has item and type. 
-            # We must assume all-time or add created_at? 
-            # For now, using all-time count as valid proxy or we should add created_at.
-        ).count()
-        
-        # 3. Reel Engagement (Weight: 0.2)
-        # Sum of likes + comments on reels featuring this food
-        reels = Reel.objects.filter(food_item=item)
-        reel_engagement = 0
-        for reel in reels:
-            reel_engagement += reel.likes.count() + reel.comments.count()
-            
-        # 🧠 Final Formula
-        raw_score = (order_count * 0.5) + (search_count * 0.3) + (reel_engagement * 0.2)
-        
-        # Normalize/Scale if needed (e.g., max 100), but raw score is fine for relative sorting
-        item.trend_score = round(raw_score, 2)
-        item.save()
-        
-    print("✅ AI Trend Scores Recalculated")
+    since = trend_window_start()
+    scanned, updated = update_trend_scores(since, batch_size=batch_size, timings=timings, progress=progress)
+    TrendWindow.objects.update_or_create(pk=1, defaults={'window_start': since})
+
+    phase_started = time.perf_counter()
+    refresh_restaurant_trend_stats()
+    timings['restaurants'] = time.perf_counter() - phase_started
+    timings['total'] = time.perf_counter() - started
+
+    report = {
+        'items_scanned': scanned,
+        'items_updated': updated,
+        'timings': {phase: round(seconds, 3) for phase, seconds in timings.items()},
+        'items_per_second': round(scanned / timings['total']) if timings['total'] else scanned,
+    }
+    print(
+        f"✅ AI Trend Scores Recalculated: {updated}/{scanned} items changed in {timings['total']:.2f}s "
+        f"(aggregate {timings['aggregate']:.2f}s, update {timings['update']:.2f}s, {report['items_per_second']} items/s)"
+    )
+    return report
 
-def calculate_trending_reels():
+def calculate_trending_reels(percentile=None, per_city=None):
     """
     🧠 Identify Trending Reels
-    Logic: If likes + comments > Threshold (e.g., 10), mark as trending.
+    Engagement = likes + (comments * 2). A reel is trending when its engagement is
+    above zero and within the top percentile (TRENDING_REEL_PERCENTILE) of all reels,
+    or of reels in the same city when per_city / TRENDING_REELS_PER_CITY is set.
+
+    Counts come from one annotated query; only rows whose engagement or trending
+    flag changed are written back.
     """
-    from .models import Reel
-    
-    # Threshold could be dynamic based on average engagement, but fixed for now
-    TRENDING_THRESHOLD = 5 
-    
-    reels = Reel.objects.all()
-    
-    for reel in reels:
-        likes = reel.likes.count()
-        comments = reel.comments.count()
-        engagement_score = likes + (comments * 2) # Comments are worth more
-        
-        reel.engagement_score = engagement_score
-        
-        if engagement_score >= TRENDING_THRESHOLD:
-            reel.is_trending = True
-        else:
-            reel.is_trending = False
-            
-        reel.save()
-        
-    print("✅ Trending Reels Updated")
+    import numpy as np
+    from django.conf import settings
+    from django.db.models import Count, IntegerField, OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+    from .models import Reel, ReelLike, Comment
+
+    if percentile is None:
+        percentile = getattr(settings, 'TRENDING_REEL_PERCENTILE', 90)
+    if per_city is None:
+        per_city = getattr(settings, 'TRENDING_REELS_PER_CITY', False)
+
+    def count_for(model):
+        return Coalesce(Subquery(
+            model.objects.filter(reel=OuterRef('pk')).order_by()
+            .values('reel').annotate(n=Count('id')).values('n'),
+            output_field=IntegerField()
+        ), 0)
+
+    rows = list(
+        Reel.objects.annotate(likes_n=count_for(ReelLike), comments_n=count_for(Comment))
+        .values_list('id', 'engagement_score', 'is_trending', 'restaurant__location', 'likes_n', 'comments_n')
+    )
+    if not rows:
+        return {'reels': 0, 'updated': 0, 'trending': 0}
+
+    engagement = np.array([row[4] + row[5] * 2 for row in rows], dtype=float) # Comments are worth more
+    groups = [row[3] if per_city else None for row in rows]
+
+    # Dynamic threshold: the top-percentile cut of each group (all reels, or per city)
+    thresholds = {}
+    group_index = {}
+    for i, group in enumerate(groups):
+        group_index.setdefault(group, []).append(i)
+    for group, indices in group_index.items():
+        thresholds[group] = np.percentile(engagement[indices], percentile)
+
+    changed = []
+    trending_count = 0
+    for i, (reel_id, old_score, old_trending, _, _, _) in enumerate(rows):
+        score = float(engagement[i])
+        is_trending = bool(score > 0 and score >= thresholds[groups[i]])
+        trending_count += is_trending
+        if score != old_score or is_trending != old_trending:
+            changed.append(Reel(id=reel_id, engagement_score=score, is_trending=is_trending))
+
+    Reel.objects.bulk_update(changed, ['engagement_score', 'is_trending'], batch_size=2000)
+
+    print(f"✅ Trending Reels Updated: {trending_count} trending, {len(changed)}/{len(rows)} rows changed")
+    return {'reels': len(rows), 'updated': len(changed), 'trending': trending_count}
@@ -3,12 +3,14 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from .models import (
     FoodItem, User, Table, Booking, Bill, Order, Restaurant, Reel, Comment, Follow, ReelLike, FoodLike,
-    Offer, UserOffer, Notification, RestaurantCrowd
+    Offer, UserOffer, Notification, RestaurantCrowd, BackgroundJob, RestaurantTrendStats, PrepForecast
 )
 from .serializers import (
     FoodItemSerializer, TableSerializer, BookingSerializer, BillSerializer, OrderSerializer, 
     RestaurantSerializer, ReelSerializer, CommentSerializer, FollowSerializer,
-    OfferSerializer, UserOfferSerializer, NotificationSerializer, RestaurantCrowdSerializer
+    OfferSerializer, UserOfferSerializer, NotificationSerializer, RestaurantCrowdSerializer,
+    BackgroundJobSerializer, RestaurantTrendStatsSerializer,
+    annotate_restaurant_stats, restaurant_stats_prefetch, order_items_prefetch
 )
 from django.views.generic import TemplateView
 from django.contrib.auth import login
@@ -20,14 +22,25 @@ from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Q, Avg, Count, Sum, F
+from django.db.models import Q, Avg, Count, Sum, F, ExpressionWrapper, FloatField
 from datetime import datetime, timedelta
 import json
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from math import radians, sin, cos, sqrt, asin
+from rest_framework.pagination import CursorPagination
+from . import geo
+from .analytics import record_interactions
+from .recommendations import update_taste_profile
+from .sellout import record_consumption
+from .forecasting import forecast_restaurant, prep_forecast_is_stale
+from .locator import restaurants_within
+from .nearby_cache import cached_nearby
+from .tracing import Trace
+from .trends import decay_mode_enabled, move_reel_engagement, record_trend_event, trend_rank_field
+from .jobs import enqueue
 
 class IndexView(TemplateView):
     template_name = "index.html"
@@ -113,19 +126,19 @@ class SearchView(LoginRequiredMixin, TemplateView):
             
             # 🧠 AI Logic: Log 'search' interaction for matched items
             # This feeds into the Trend Score = (search * 0.3) formula
+            # (the buffered flush pushes the trend deltas, see core.analytics)
             if self.request.user.is_authenticated:
-                for item in food_items:
-                    FoodAnalytics.objects.create(food_item=item, interaction_type='search')
+                record_interactions('search', list(food_items.values_list('id', flat=True)))
         else:
             # Default ordering if no specific query
             if not sort_by:
                 restaurants = restaurants.order_by('-rating')
-                food_items = food_items.order_by('-trend_score')
+                food_items = food_items.order_by(f'-{trend_rank_field()}')
 
         # Apply Sorting
         if sort_by == 'top_rated':
             restaurants = restaurants.order_by('-rating')
-            food_items = food_items.order_by('-popularity_score', '-trend_score') # Food doesn't have rating field in model yet, usage popularity/trend
+            food_items = food_items.order_by('-popularity_score', f'-{trend_rank_field()}') # Food doesn't have rating field in model yet, usage popularity/trend
 
         # Apply Filtering (Type)
         if filter_type == 'restaurants':
@@ -245,10 +258,53 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             
         return context
 
+class GeoCursorPagination(CursorPagination):
+    """
+    Keyset pagination for FoodItemViewSet geo queries.
+    Avoids COUNT(*) and deep OFFSET scans over large result sets.
+    """
+    page_size = 50
+
+    def get_ordering(self, request, queryset, view):
+        return view.get_geo_ordering()
+
 class FoodItemViewSet(viewsets.ModelViewSet):
     serializer_class = FoodItemSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    # ?ordering= values supported in geo mode
+    GEO_ORDERINGS = {
+        'distance': ('distance_km', 'id'),
+        'relevance': ('-geo_score', 'id'),  # trend_score blended with distance
+    }
+
+    def get_geo_params(self):
+        """Return (lat, lng, radius_km) when the request asks for a geo query, else None."""
+        try:
+            lat = float(self.request.query_params['lat'])
+            lng = float(self.request.query_params['lng'])
+            radius = float(self.request.query_params['radius'])
+        except (KeyError, ValueError):
+            return None # Ignore missing/invalid params
+        try:
+            geo.check_search_params(lat, lng, radius)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc)) # nan/inf/out of range must not reach the locator
+        return lat, lng, radius
+
+    def get_geo_ordering(self):
+        ordering = self.request.query_params.get('ordering', 'distance')
+        return self.GEO_ORDERINGS.get(ordering, self.GEO_ORDERINGS['distance'])
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.action == 'list' and self.get_geo_params():
+                self._paginator = GeoCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
     def get_queryset(self):
         queryset = FoodItem.objects.all()
         user = self.request.user
@@ -257,36 +313,28 @@ class FoodItemViewSet(viewsets.ModelViewSet):
         if user.is_authenticated and user.role == 'restaurant':
             queryset = queryset.filter(restaurant__user=user)
 
-        # Location-based filtering (Optional)
-        lat = self.request.query_params.get('lat')
-        lng = self.request.query_params.get('lng')
-        radius = self.request.query_params.get('radius') # in km
-
-        if lat and lng and radius:
-            try:
-                lat = float(lat)
-                lng = float(lng)
-                radius = float(radius)
-                
-                # Bounding Box Calculation (Approximate)
-                # 1 degree lat ~= 111km
-                degree_delta = radius / 111.0
-                
-                lat_min = lat - degree_delta
-                lat_max = lat + degree_delta
-                # Longitude correction (cos(lat))
-                # optimization: just use max degree delta for lng too (slightly larger box is fine)
-                lng_min = lng - degree_delta
-                lng_max = lng + degree_delta
-
-                queryset = queryset.filter(
-                    restaurant__latitude__range=(lat_min, lat_max),
-                    restaurant__longitude__range=(lng_min, lng_max)
-                )
-            except ValueError:
-                pass # Ignore invalid params
+        # Location-based filtering (Optional): lat, lng, radius (in km)
+        geo_params = self.get_geo_params()
+        if geo_params:
+            lat, lng, radius = geo_params
+
+            # Candidates are narrowed in SQL by the geohash cells and the bounding box
+            # covering the circle (a bounded number of parameters however many restaurants
+            # match), then the exact distance is filtered, ordered and paginated there
+            distance_weight = getattr(settings, 'FOOD_GEO_DISTANCE_WEIGHT', 1.0)
+            queryset = queryset.filter(
+                geo.geohash_q(geo.covering_cells(lat, lng, radius), field='restaurant__geohash'),
+                geo.bounding_box_q(lat, lng, radius, 'restaurant__latitude', 'restaurant__longitude'),
+                restaurant__is_open=True,
+            ).annotate(
+                distance_km=geo.distance_expression(lat, lng, 'restaurant__latitude', 'restaurant__longitude')
+            ).filter(
+                distance_km__lte=radius
+            ).annotate(
+                geo_score=ExpressionWrapper(F('trend_score') - distance_weight * F('distance_km'), output_field=FloatField())
+            )
 
-        return queryset
+        return queryset.prefetch_related(restaurant_stats_prefetch(self.request))
 
 
     def perform_create(self, serializer):
@@ -307,9 +355,21 @@ class FoodItemViewSet(viewsets.ModelViewSet):
 
 from rest_framework import filters
 
+class TrendOrderingFilter(filters.OrderingFilter):
+    """Sorts by the exponentially decayed trend score when TREND_SCORE_MODE = 'decayed'."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and decay_mode_enabled():
+            ordering = [
+                field.replace('trend_score', 'decayed_rank') if field.lstrip('-') == 'trend_score' else field
+                for field in ordering
+            ]
+        return ordering
+
 class FoodListView(generics.ListAPIView):
     serializer_class = FoodItemSerializer
-    filter_backends = [filters.OrderingFilter]
+    filter_backends = [TrendOrderingFilter]
     ordering_fields = ['trend_score', 'price', 'rating', 'created_at', 'popularity_score']
     ordering = ['-trend_score'] # Default to trending
 
@@ -331,7 +391,7 @@ class FoodListView(generics.ListAPIView):
         # REMOVED LEGACY TEXT-BASED NEARBY LOGIC
         # Now relying strictly on GPS-based NearbyRestaurantsAPIView
             
-        return queryset
+        return queryset.prefetch_related(restaurant_stats_prefetch(self.request))
 
 class RestaurantViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = RestaurantSerializer
@@ -349,47 +409,124 @@ class RestaurantViewSet(viewsets.ReadOnlyModelViewSet):
         # if location:
         #    queryset = queryset.filter(location__icontains=location)
             
-        return queryset
+        return annotate_restaurant_stats(queryset.select_related('user'), self.request)
 
 class TrendView(generics.ListAPIView):
     serializer_class = FoodItemSerializer
 
     def get_queryset(self):
-        # Return top 5 items sorted by trend_score descending
-        return FoodItem.objects.order_by('-trend_score')[:5]
+        # Return top 5 items sorted by trend (decayed_rank in decayed mode) descending
+        return FoodItem.objects.prefetch_related(restaurant_stats_prefetch(self.request)).order_by(f'-{trend_rank_field()}')[:5]
 
-from .utils import calculate_trend_scores, calculate_trending_reels
 
 class RefreshTrendView(APIView):
     """
-    API to manually trigger AI Trend Calculation.
-    In production, this would be a Celery task.
+    API to trigger AI Trend Calculation.
+    The work runs in the background job worker (`manage.py run_jobs`);
+    concurrent requests share the same queued/running job.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        calculate_trend_scores()
-        calculate_trending_reels()
-        return Response({'status': 'AI Trend Scores Refreshed', 'message': 'Successfully recalculated trends based on orders, searches, and reels.'})
+        job, created = enqueue('refresh_trends', user=request.user)
+        return Response({
+            'status': 'AI Trend Refresh Queued' if created else 'AI Trend Refresh Already In Progress',
+            'job': BackgroundJobSerializer(job).data,
+        }, status=status.HTTP_202_ACCEPTED)
+
+class BackgroundJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status and progress of background jobs."""
+    serializer_class = BackgroundJobSerializer
+    permission_classes = [IsAuthenticated]
 
-class AvailabilityToggleView(APIView):
-    def post(self, request):
-        calculate_trend_scores()
-        calculate_trending_reels()
-        return Response({'status': 'AI Trend Scores Refreshed', 'message': 'Successfully recalculated trends based on orders, searches, and reels.'})
+    def get_queryset(self):
+        queryset = BackgroundJob.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(requested_by=self.request.user)
+        kind = self.request.query_params.get('kind')
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        return queryset
+
+class TrendingRestaurantsView(generics.ListAPIView):
+    """
+    Restaurants ranked by the average trend score of their menu, served from the
+    materialized RestaurantTrendStats table (refreshed with the trend scores).
+    Optional ?city= filter; ?ordering= avg_trend_score, max_trend_score or item_count.
+    """
+    serializer_class = RestaurantTrendStatsSerializer
+    permission_classes = [AllowAny]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['avg_trend_score', 'max_trend_score', 'item_count']
+    ordering = ['-avg_trend_score', 'restaurant_id']
+
+    def get_queryset(self):
+        queryset = RestaurantTrendStats.objects.select_related('restaurant')
+        city = self.request.query_params.get('city')
+        if city:
+            queryset = queryset.filter(city__icontains=city)
+        return queryset
 
 class DemandPredictionView(APIView):
     """
-    🧠 AI Future Demand Prediction (Mock/Basic)
-    Predicts demand based on Day of Week and Time.
+    🧠 AI Future Demand Prediction
+    Forecasts the next 24 hours of orders for a restaurant from its hour-of-week
+    order history (see core.forecasting). Forecasts reveal real order volumes, so
+    only the restaurant's owner and staff (or a superuser, via ?restaurant=<id>)
+    can read them. Without a restaurant, falls back to the Day of Week rules.
     """
-    permission_classes = [permissions.AllowAny]
+    permission_classes = [permissions.IsAuthenticated]
+
+    SUGGESTED_PREP = {
+        'High': "Prepare extra biryani and starters.",
+        'Medium': "Standard inventory sufficient.",
+        'Low': "Focus on offers to boost sales.",
+    }
+    DEMAND_EMOJI = {'High': 'High 📈', 'Medium': 'Medium 📊', 'Low': 'Low 📉'}
+
+    def get_restaurant_id(self, request):
+        user = request.user
+        own_id = None
+        if user.role == 'restaurant' and hasattr(user, 'restaurant_profile'):
+            own_id = user.restaurant_profile.id
+        elif user.role == 'staff' and user.staff_restaurant_id:
+            own_id = user.staff_restaurant_id
+
+        restaurant_id = request.query_params.get('restaurant')
+        if not restaurant_id:
+            return own_id
+        try:
+            restaurant_id = int(restaurant_id)
+        except ValueError:
+            raise serializers.ValidationError("restaurant must be an integer id")
+        if restaurant_id != own_id and not user.is_superuser:
+            raise PermissionDenied("You can only view forecasts of your own restaurant")
+        return restaurant_id
 
     def get(self, request):
         import datetime
         today = datetime.datetime.now().strftime("%A") # e.g., 'Friday'
-        
-        # Simple Rule-Based AI Logic
+
+        restaurant_id = self.get_restaurant_id(request)
+        if restaurant_id is not None:
+            forecast = forecast_restaurant(restaurant_id)
+            if forecast['typical_daily'] > 0:
+                ratio = forecast['expected_total'] / forecast['typical_daily']
+                level = 'High' if ratio >= 1.15 else 'Low' if ratio <= 0.85 else 'Medium'
+                return Response({
+                    "day": today,
+                    "demand_level": self.DEMAND_EMOJI[level],
+                    "peak_hours": forecast['peak_hours'],
+                    "reason": (
+                        f"{forecast['expected_total']:g} orders expected in the next 24h vs "
+                        f"{forecast['typical_daily']:g} on a typical day ({forecast['history_weeks']} weeks of history)"
+                    ),
+                    "suggested_prep": self.SUGGESTED_PREP[level],
+                    "restaurant": restaurant_id,
+                    "forecast": forecast,
+                })
+
+        # Simple Rule-Based AI Logic (no restaurant or no order history yet)
         if today in ['Friday', 'Saturday', 'Sunday']:
             prediction = {
                 "day": today,
@@ -417,6 +554,37 @@ class DemandPredictionView(APIView):
             
         return Response(prediction)
 
+class PrepForecastView(DemandPredictionView):
+    """
+    🍳 Kitchen Prep Forecast
+    Expected units per dish for each hour of the next service, top dishes first
+    (see core.forecasting.build_prep_forecasts). Loaded once per shift by the
+    kitchen dashboard; only for the restaurant's owner and staff, like
+    DemandPredictionView. Forecasts are built in batch: a missing or stale one
+    queues the 'prep_forecasts' job instead of being computed in the request.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        restaurant_id = self.get_restaurant_id(request)
+        if restaurant_id is None:
+            raise PermissionDenied("Prep forecasts are only available to restaurant owners and staff")
+        forecast = PrepForecast.objects.filter(restaurant_id=restaurant_id).first()
+        stale = forecast is None or prep_forecast_is_stale(forecast)
+        if stale:
+            enqueue('prep_forecasts', user=request.user)
+        if forecast is None:
+            return Response({'error': 'No prep forecast yet, one is being built'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'restaurant': restaurant_id,
+            'service_start': forecast.service_start,
+            'computed_at': forecast.computed_at,
+            'stale': stale,
+            'hours': forecast.hours,
+            'prep_minutes': forecast.prep_minutes,
+            'items': forecast.items,
+        })
+
 class AvailabilityToggleView(APIView):
     def post(self, request, pk):
         try:
@@ -433,7 +601,7 @@ def available_food_items(request):
     """
     List all available food items.
     """
-    items = FoodItem.objects.filter(is_available=True)
+    items = FoodItem.objects.filter(is_available=True).prefetch_related(restaurant_stats_prefetch())
     serializer = FoodItemSerializer(items, many=True)
     return Response(serializer.data)
 
@@ -529,7 +697,7 @@ class DiningOrderViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Order.objects.all()
+        queryset = Order.objects.select_related('table', 'restaurant').prefetch_related(order_items_prefetch(self.request))
         
         # Filter by Role
         if user.role == 'restaurant':
@@ -571,15 +739,27 @@ class DiningOrderViewSet(viewsets.ModelViewSet):
         # 2. Real-Time Availability Logic 🧠
         # Decrement stock and auto-hide if empty
         if order:
+            # Each order counts once per item towards the trend score
+            record_trend_event('order', set(order.items.values_list('id', flat=True)))
+            update_taste_profile(order)
+
             for item in order.items.all():
                 if item.quantity_available > 0:
-                    item.quantity_available -= 1
-                    
-                    # Logic: When stock = 0 -> Automatically hide item
-                    if item.quantity_available <= 0:
-                        item.is_available = False
-                    
-                    item.save()
+                    # Also updates the item's order velocity and sell-out estimate
+                    item.save(update_fields=record_consumption(item))
+
+    def perform_update(self, serializer):
+        # Items added to or removed from the order move its trend contribution
+        before = set(serializer.instance.items.values_list('id', flat=True))
+        order = serializer.save()
+        after = set(order.items.values_list('id', flat=True))
+        record_trend_event('order', after - before, occurred_at=order.created_at)
+        record_trend_event('order', before - after, sign=-1, occurred_at=order.created_at)
+
+    def perform_destroy(self, instance):
+        item_ids = set(instance.items.values_list('id', flat=True))
+        instance.delete()
+        record_trend_event('order', item_ids, sign=-1, occurred_at=instance.created_at)
 
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
@@ -625,7 +805,10 @@ class BillingView(APIView):
                     grand_total=grand_total
                 )
                 orders.update(bill=bill)
-                
+
+            prefetch_related_objects([bill], Prefetch(
+                'orders', queryset=Order.objects.select_related('table', 'restaurant').prefetch_related(order_items_prefetch())
+            ))
             return Response(BillSerializer(bill).data)
 
         elif action == 'pay':
@@ -692,12 +875,15 @@ class ReelViewSet(viewsets.ModelViewSet):
         reel = self.get_object()
         if reel.restaurant.user != self.request.user:
             raise PermissionDenied("You can only edit your own reels")
-        serializer.save()
+        updated = serializer.save()
+        # Relinking a reel moves its likes/comments to the new item's trend score
+        move_reel_engagement(reel.id, reel.food_item_id, updated.food_item_id)
     
     def perform_destroy(self, instance):
         """Ensure only the reel owner can delete it"""
         if instance.restaurant.user != self.request.user:
             raise PermissionDenied("You can only delete your own reels")
+        move_reel_engagement(instance.id, instance.food_item_id, None)
         instance.delete()
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
@@ -706,7 +892,9 @@ class ReelViewSet(viewsets.ModelViewSet):
         like, created = ReelLike.objects.get_or_create(user=request.user, reel=reel)
         if not created:
             like.delete()
+            record_trend_event('reel', [reel.food_item_id], sign=-1, occurred_at=like.created_at)
             return Response({'status': 'unliked', 'likes_count': reel.likes.count()})
+        record_trend_event('reel', [reel.food_item_id])
         return Response({'status': 'liked', 'likes_count': reel.likes.count()})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
@@ -716,6 +904,7 @@ class ReelViewSet(viewsets.ModelViewSet):
         if not text:
             return Response({'error': 'Text required'}, status=400)
         comment = Comment.objects.create(user=request.user, reel=reel, text=text)
+        record_trend_event('reel', [reel.food_item_id])
         return Response(CommentSerializer(comment).data)
 
     @action(detail=True, methods=['get'])
@@ -948,8 +1137,6 @@ def update_crowd_status(request):
 
 # === LOCATION BASED SEARCH VIEW ===
 
-from math import radians, cos, sin, asin, sqrt
-
 class NearbyRestaurantsAPIView(APIView):
     """
     API View to fetch restaurants based on user's location (latitude, longitude).
@@ -967,56 +1154,53 @@ class NearbyRestaurantsAPIView(APIView):
                 {"error": "Invalid latitude, longitude, or radius Parameters. Must be numbers."},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            geo.check_search_params(user_lat, user_lng, radius_km)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        trace = Trace('nearby-restaurants')
+
+        def compute_tile(center_lat, center_lng, search_radius):
+            trace.count('cache', 'miss')
+            # In-memory ball tree of open restaurants (or geohash cell scans when disabled)
+            with trace.phase('distance'):
+                ids, _ = restaurants_within(center_lat, center_lng, search_radius)
+
+            # Only the restaurants that survived the distance filter are loaded and serialized
+            # (is_open is re-checked in case another worker closed a restaurant since our index was built)
+            with trace.phase('db'):
+                restaurants = annotate_restaurant_stats(
+                    Restaurant.objects.filter(is_open=True).select_related('user'), request
+                ).in_bulk(ids.tolist())
+                found = [restaurants[restaurant_id] for restaurant_id in ids.tolist() if restaurant_id in restaurants]
+            with trace.phase('serialize'):
+                data = [dict(item) for item in RestaurantSerializer(found, many=True, context={'request': request}).data]
+            return {
+                'lats': [restaurant.latitude for restaurant in found],
+                'lngs': [restaurant.longitude for restaurant in found],
+                'data': data,
+            }
 
-        # Optimization: First filter by a rough bounding box
-        # 1 deg lat ~= 111km. 
-        degrees_delta = radius_km / 111.0
-        # Add a small buffer for edge cases, but keep it tight
-        degrees_delta *= 1.1 
-        
-        lat_min = user_lat - degrees_delta
-        lat_max = user_lat + degrees_delta
-        lng_min = user_lng - degrees_delta
-        lng_max = user_lng + degrees_delta
-
-        print(f"DEBUG: Bounding Box: {lat_min} to {lat_max}, {lng_min} to {lng_max}")
-
-        candidates = Restaurant.objects.filter(
-            latitude__range=(lat_min, lat_max),
-            longitude__range=(lng_min, lng_max),
-            is_open=True
-        )
-        print(f"DEBUG: Candidates found: {candidates.count()}")
-
-        nearby_restaurants = []
-
-        for restaurant in candidates:
-            if restaurant.latitude is None or restaurant.longitude is None:
-                continue
-
-            # Haversine Formula
-            lon1, lat1, lon2, lat2 = map(radians, [user_lng, user_lat, restaurant.longitude, restaurant.latitude])
-            dlon = lon2 - lon1
-            dlat = lat2 - lat1
-            a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-            c = 2 * asin(sqrt(a))
-            r = 6371 # Radius of earth in kilometers
-            distance = c * r
-
-            print(f"DEBUG: User Location: {user_lat}, {user_lng} | Radius: {radius_km}")
-
-            if distance <= radius_km:
-                print(f"DEBUG: Keeping {restaurant.name} (Dist: {distance:.2f}km)")
-                serializer = RestaurantSerializer(restaurant, context={'request': request})
-                data = serializer.data
+        # Tile results are shared between users, so is_following is filled in per request
+        matches = cached_nearby(user_lat, user_lng, radius_km, compute_tile, trace=trace)
+        following = set()
+        if matches and request.user.is_authenticated:
+            with trace.phase('db'):
+                following = set(Follow.objects.filter(
+                    follower=request.user,
+                    restaurant_id__in=[data['id'] for data, _ in matches]
+                ).values_list('restaurant_id', flat=True))
+
+        with trace.phase('serialize'):
+            nearby_restaurants = []
+            for data, distance in matches:
+                data = dict(data)
+                data['is_following'] = data['id'] in following
                 data['distance_km'] = round(distance, 2)
                 nearby_restaurants.append(data)
-            else:
-                print(f"DEBUG: Skipping {restaurant.name} (Dist: {distance:.2f}km > {radius_km}km)")
-
-        # Sort by distance
-        nearby_restaurants.sort(key=lambda x: x['distance_km'])
 
+        trace.finish(filtered=len(nearby_restaurants), radius_km=radius_km)
         return Response(nearby_restaurants)
 
 class RestaurantProfileUpdateView(generics.UpdateAPIView):
@@ -1027,7 +1211,9 @@ class RestaurantProfileUpdateView(generics.UpdateAPIView):
         # Ensure the user has a restaurant profile
         if not hasattr(self.request.user, 'restaurant_profile'):
              raise serializers.ValidationError("User is not a restaurant.")
-        return self.request.user.restaurant_profile
+        return annotate_restaurant_stats(
+            Restaurant.objects.select_related('user'), self.request
+        ).get(pk=self.request.user.restaurant_profile.pk)
 
     def update(self, request, *args, **kwargs):
         # Handle 'image' file upload specifically if present
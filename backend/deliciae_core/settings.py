@@ -211,3 +211,91 @@ CSRF_COOKIE_HTTPONLY = False  # Make it easier for JS (if needed, though django
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# AI Trend Scores
+# 'window': (orders*0.5 + searches*0.3 + reels*0.2) over the last 7 days
+# 'decayed': same weights with exponential time decay; run `manage.py rebuild_decayed_trends` after switching
+TREND_SCORE_MODE = 'window'
+TREND_HALF_LIFE_HOURS = 72
+# Reels in the top (100 - percentile)% of engagement are marked trending, optionally ranked within each city
+TRENDING_REEL_PERCENTILE = 90
+TRENDING_REELS_PER_CITY = False
+
+# Background Jobs (`manage.py run_jobs`)
+# Running jobs/locks with no progress for this many seconds are considered dead
+JOB_STALE_AFTER = 1800
+# Interaction logging (core.analytics) is buffered per worker: flush after this many events or seconds
+ANALYTICS_BUFFER_SIZE = 500
+ANALYTICS_FLUSH_INTERVAL = 5
+
+# Nearby Search
+# Per-worker in-memory ball tree of open restaurants (falls back to geohash range scans when disabled)
+RESTAURANT_LOCATOR_ENABLED = True
+# Rebuild the index after this many seconds so changes made by other workers are picked up
+RESTAURANT_LOCATOR_MAX_AGE = 300
+# FoodItemViewSet geo mode (?ordering=relevance): trend_score points subtracted per km of distance
+FOOD_GEO_DISTANCE_WEIGHT = 1.0
+# Fraction of nearby-search requests to trace (phase timings logged to 'core.trace'); 0 disables tracing
+GEO_TRACE_SAMPLE_RATE = 0.0
+# Nearby responses are cached per location tile (~1.1km) and radius for this many seconds
+NEARBY_CACHE_TILE_DEG = 0.01
+NEARBY_CACHE_TTL = 60
+# Largest radius (km) accepted by the geo search endpoints
+GEO_MAX_RADIUS_KM = 100
+
+# Recommendations
+# Serialized /api/recommendations/ responses are cached per user for this many seconds
+RECOMMENDATION_CACHE_TTL = 300
+# `manage.py precompute_recommendations` covers customers who ordered in the last N days;
+# RecommendationView serves its results while they are younger than the max age (seconds)
+RECOMMENDATION_BATCH_DAYS = 30
+RECOMMENDATION_PRECOMPUTE_MAX_AGE = 86400
+
+# Smart highlights snapshot: rebuilt after this many seconds, or after trend/stock changes
+# (but not more often than the minimum refresh interval); stale copies are served meanwhile
+SMART_HIGHLIGHTS_TTL = 60
+SMART_HIGHLIGHTS_MIN_REFRESH = 5
+
+# Sell-out prediction: time constant of the order-velocity EWMA, the smallest shift
+# of the projected sell-out time worth writing back, and how far ahead (hours) a
+# projection still counts as "selling out"
+SELLOUT_RATE_TAU_MINUTES = 30
+SELLOUT_MIN_SHIFT_MINUTES = 5
+SELLOUT_HORIZON_HOURS = 24
+
+# Demand forecasting: weeks of order history in the hour-of-week profiles, and how often
+# (seconds) a cached profile is rebuilt from the database
+DEMAND_HISTORY_WEEKS = 8
+DEMAND_PROFILE_REBUILD = 86400
+
+# Kitchen prep forecasts: hours in a service, dishes listed per restaurant, and the age
+# (seconds) after which the endpoint queues the 'prep_forecasts' job to rebuild them
+PREP_FORECAST_HOURS = 12
+PREP_FORECAST_TOP_ITEMS = 10
+PREP_FORECAST_MAX_AGE = 21600
+
+# Cache
+# Local memory is per process; point this at a shared backend (Redis/Memcached) in production
+# so cache invalidation reaches every worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}